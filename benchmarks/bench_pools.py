@@ -0,0 +1,178 @@
+"""
+Script: bench_pools.py
+
+Description:
+Compares the per-sample pool detection loops of `Step_pool.py` (dual-sensor
+regions with look-back/look-forward to the baseline) and
+`Step_pool_Update.py` (median + std threshold) with the vectorised
+`drifter.pools.detect_pools_dual` and `detect_pools_std`. The output is
+first checked for equality on random pressure signals with varied windows,
+thresholds and minimum durations (regions open at the start or end of the
+data included), then both versions are timed on a long synthetic trace
+(1 million samples by default, about 3 hours at 100 Hz).
+
+Usage:
+    python benchmarks/bench_pools.py [n_samples] [n_checks]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.pools import detect_pools_dual, detect_pools_std
+
+
+def legacy_detect_pools_dual(pressure1, pressure2, window_size=2, threshold=15, min_duration=0.001):
+    def _detect_single(pressure_data):
+        baseline = np.mean(pressure_data)
+        dynamic_threshold = baseline + threshold
+        smoothed = pd.Series(pressure_data).rolling(window=window_size, center=True).mean().values
+        above_threshold = smoothed > dynamic_threshold
+
+        regions = []
+        in_region = False
+        start_idx = 0
+
+        for i in range(len(above_threshold)):
+            if above_threshold[i] and not in_region:
+                look_back = max(0, i - window_size * 2)
+                for j in range(i, look_back, -1):
+                    if smoothed[j] <= baseline:
+                        start_idx = j
+                        break
+                else:
+                    start_idx = i
+                in_region = True
+
+            elif not above_threshold[i] and in_region:
+                look_forward = min(len(smoothed), i + window_size * 2)
+                for j in range(i, look_forward):
+                    if smoothed[j] <= baseline:
+                        end_idx = j
+                        break
+                else:
+                    end_idx = i
+
+                if (end_idx - start_idx) >= min_duration:
+                    regions.append((start_idx, end_idx))
+                in_region = False
+
+        if in_region and (len(smoothed) - start_idx) >= min_duration:
+            look_back = max(0, len(smoothed) - window_size * 2)
+            for j in range(len(smoothed) - 1, look_back, -1):
+                if smoothed[j] <= baseline:
+                    end_idx = j
+                    break
+            else:
+                end_idx = len(smoothed)
+            regions.append((start_idx, end_idx))
+
+        return regions
+
+    all_regions = _detect_single(pressure1) + _detect_single(pressure2)
+    all_regions.sort()
+
+    pools = []
+    if all_regions:
+        current_start, current_end = all_regions[0]
+        for start, end in all_regions[1:]:
+            if start <= current_end + window_size:
+                current_end = max(current_end, end)
+            else:
+                pools.append((current_start, current_end))
+                current_start, current_end = start, end
+        pools.append((current_start, current_end))
+
+    return pools
+
+
+def legacy_detect_pools_std(pressure1, pressure2, window_size=2, std_multiplier=5, min_duration=0.001):
+    def _detect_single(pressure_data):
+        smoothed = pd.Series(pressure_data).rolling(window=window_size, center=True).mean().values
+        baseline = np.nanmedian(smoothed)
+        std = np.nanstd(smoothed)
+        return smoothed > baseline + std_multiplier * std
+
+    combined_threshold = _detect_single(pressure1) | _detect_single(pressure2)
+
+    regions = []
+    in_region = False
+    start_idx = 0
+
+    for i in range(len(combined_threshold)):
+        if combined_threshold[i] and not in_region:
+            start_idx = i
+            in_region = True
+        elif not combined_threshold[i] and in_region:
+            end_idx = i
+            if (end_idx - start_idx) >= min_duration:
+                regions.append((start_idx, end_idx))
+            in_region = False
+
+    if in_region and (len(combined_threshold) - start_idx) >= min_duration:
+        regions.append((start_idx, len(combined_threshold) - 1))
+
+    return regions
+
+
+def synthetic_pressure(n_samples, rng, n_pools=None, max_width=None):
+    """Noisy baseline pressure with smooth high-pressure bumps, some of them cut by the start or end."""
+    pressure = 1000 + rng.normal(scale=rng.uniform(0.1, 5), size=n_samples)
+    n_pools = rng.integers(0, 6) if n_pools is None else n_pools
+    max_width = max(3, n_samples / 10) if max_width is None else max_width
+    positions = np.arange(n_samples)
+    for center in rng.uniform(-0.05, 1.05, size=n_pools) * n_samples:
+        width = rng.uniform(2, max_width)
+        near = slice(max(0, int(center - 6 * width)), max(0, int(center + 6 * width) + 1))
+        pressure[near] += rng.uniform(5, 60) * np.exp(-0.5 * ((positions[near] - center) / width) ** 2)
+    return pressure
+
+
+def same_regions(old, new):
+    return np.array_equal(np.asarray(old, dtype='int64').reshape(-1, 2), np.asarray(new).reshape(-1, 2))
+
+
+def check_equivalence(n_checks, rng):
+    for check in range(n_checks):
+        n_samples = int(rng.integers(60, 3000))
+        pressure1, pressure2 = synthetic_pressure(n_samples, rng), synthetic_pressure(n_samples, rng)
+        window_size = int(rng.choice([1, 2, 3, 5, 10, 25]))
+        threshold = float(rng.uniform(0, 40))
+        std_multiplier = float(rng.uniform(0.5, 6))
+        min_duration = float(rng.choice([0, 0.001, 3, 20, 100]))
+
+        old = legacy_detect_pools_dual(pressure1, pressure2, window_size, threshold, min_duration)
+        new = detect_pools_dual(pressure1, pressure2, window_size, threshold, min_duration)
+        assert same_regions(old, new), f"detect_pools_dual differs on check {check}: {old} != {new.tolist()}"
+        old = legacy_detect_pools_std(pressure1, pressure2, window_size, std_multiplier, min_duration)
+        new = detect_pools_std(pressure1, pressure2, window_size, std_multiplier, min_duration)
+        assert same_regions(old, new), f"detect_pools_std differs on check {check}: {old} != {new.tolist()}"
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_checks = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+
+    rng = np.random.default_rng(0)
+    check_equivalence(n_checks, rng)
+    print(f"{n_checks} random signals: identical regions for detect_pools_dual and detect_pools_std")
+
+    pressure1 = synthetic_pressure(n_samples, rng, n_pools=200, max_width=500)
+    pressure2 = synthetic_pressure(n_samples, rng, n_pools=200, max_width=500)
+    for name, legacy, vectorised, parameter in [('detect_pools_dual', legacy_detect_pools_dual, detect_pools_dual, 15),
+                                                ('detect_pools_std', legacy_detect_pools_std, detect_pools_std, 5)]:
+        old, old_time = timed(legacy, pressure1, pressure2, 2, parameter)
+        new, new_time = timed(vectorised, pressure1, pressure2, 2, parameter)
+        assert same_regions(old, new), f"{name} differs on the {n_samples}-sample trace"
+        print(f"{name}: {len(new)} regions in {n_samples} samples, "
+              f"loop {old_time:.3f} s, vectorised {new_time:.3f} s, speedup {old_time / new_time:.1f}x")
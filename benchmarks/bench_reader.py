@@ -0,0 +1,76 @@
+"""
+Script: bench_reader.py
+
+Description:
+Compares the old `engine='python'` loader used by the screening and analysis
+scripts with `drifter.io.read_drifter_log` on a synthetic 100 Hz M-file.
+A few corrupted bytes, short rows and GPS tails are mixed in so that both
+paths have to deal with the same kind of bad lines as the field logs.
+
+Usage:
+    python benchmarks/bench_reader.py [hours]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.io import COLUMN_NAMES, read_drifter_log
+
+
+def write_synthetic_log(file_path, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n_rows, 16)) + 1000
+    times = 1000 + np.arange(n_rows) * 10
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for i in range(n_rows):
+            fields = [str(times[i])] + [f'{v:.3f}' for v in values[i]]
+            if i % 997 == 500:
+                fields[2] = '1�2'  # corrupted byte
+            if i % 1499 == 700:
+                fields = fields[:9]  # truncated line
+            if i % 501 == 250:
+                fields += ['$GPGGA', '123519', '4807.038', 'N']  # GPS tail
+            f.write(','.join(fields) + '\n')
+
+
+def legacy_loader(file_path):
+    data_file = pd.read_csv(
+        file_path, names=COLUMN_NAMES, delimiter=',', header=None, na_values=['', ' '],
+        engine='python', usecols=range(17), on_bad_lines='skip', encoding='ISO-8859-1'
+    )
+    data_file.replace('�', pd.NA, inplace=True)
+    for col in COLUMN_NAMES:
+        if col != 'time':
+            data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+    return data_file
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    n_rows = int(hours * 3600 * 100)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'M99-synthetic.txt')
+        write_synthetic_log(file_path, n_rows)
+        size_mb = os.path.getsize(file_path) / 1e6
+        print(f"Synthetic log: {n_rows} rows, {size_mb:.1f} MB")
+
+        old, old_time = timed(legacy_loader, file_path)
+        new, new_time = timed(read_drifter_log, file_path)
+
+    # both loaders must agree on the parsed values
+    pd.testing.assert_frame_equal(old.astype('float64'), new.astype('float64'), check_exact=False)
+    print(f"engine='python' loader: {old_time:.2f} s")
+    print(f"read_drifter_log:       {new_time:.2f} s")
+    print(f"Speedup: {old_time / new_time:.1f}x")
@@ -0,0 +1,57 @@
+"""
+Script: bench_stages.py
+
+Description:
+Times every shared processing stage on its own, on a synthetic 100 Hz M-file,
+in the order the analysis scripts run them: parsing, cached channel load,
+time columns, rotation, Kalman smoothing, rolling variance and ROI
+screening. Use it to see which stage dominates before optimising, or run a
+single stage under a profiler, e.g.
+
+    python -m cProfile -s cumtime benchmarks/bench_stages.py 1 | head -30
+
+Usage:
+    python benchmarks/bench_stages.py [hours]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.io import read_drifter_log
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
+from drifter.rolling import rolling_var
+from drifter.screening import PRESSURE_COLUMNS, screen_log
+from drifter.store import load_channels
+
+from bench_reader import write_synthetic_log
+
+
+def timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<34}{time.perf_counter() - start:8.3f} s")
+    return result
+
+
+if __name__ == '__main__':
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    n_rows = int(hours * 3600 * 100)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'M99-synthetic.txt')
+        write_synthetic_log(file_path, n_rows)
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        print(f"Synthetic log: {n_rows} rows")
+
+        data_file = timed('read_drifter_log', read_drifter_log, file_path)
+        channels = ['time', 'pressure1', 'pressure2', 'accx', 'accy', 'accz']
+        timed('load_channels (first run, parse)', load_channels, file_path, channels, cache_dir=cache_dir)
+        data_file = timed('load_channels (cached, mmap)', load_channels, file_path, channels, cache_dir=cache_dir)
+
+        timed('add_time_columns', add_time_columns, data_file)
+        timed('prepare_acceleration (rotation)', prepare_acceleration, data_file)
+        timed('smooth_acceleration (Kalman)', smooth_acceleration, data_file)
+        timed('rolling_var (2 channels)', rolling_var, data_file[PRESSURE_COLUMNS].to_numpy(), 50)
+        timed('screen_log', screen_log, data_file.copy(), 50, 2)
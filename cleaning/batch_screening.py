@@ -0,0 +1,154 @@
+"""
+Script: batch_screening.py
+
+Description:
+Runs the screening of `screening_plott.py` over a whole campaign instead of a
+single hard-coded file. It:
+
+1. Finds every raw log (M14-M24 style `.txt` files) below the dataset root.
+2. Screens the files in parallel, one process per available core.
+3. Writes the results in the usual layout as a compact ROI descriptor
+   (source file, start/end row, parameters):
+   <output_root>/<date>/<sensor>/<file>/roi.json
+   With --export-tsv the full filtered_pressure{1,2}.txt files are written too.
+4. Prints the time taken per file, collects failures without stopping the
+   batch and saves everything to <output_root>/screening_report.csv.
+
+Every screened file is recorded in <output_root>/screening_manifest.json with
+its content hash, `window_size`, `k` and output paths. On the next run only
+new or modified files, or files screened with other parameters, are
+processed again (use --force to rescreen everything).
+
+Usage:
+    python cleaning/batch_screening.py [dataset_root] [output_root] [--k 2] [--window-size 50] [--force] [--export-tsv]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.cache import file_digest
+from drifter.manifest import is_up_to_date, load_manifest, record, save_manifest
+from drifter.roi import ROI_FILE
+from drifter.screening import screen_file
+
+dataset_root = 'H:/Rida/Dataset'
+output_root = 'H:/Rida/new_data'
+
+RAW_LOG_PATTERN = re.compile(r'^M\d{2}-?\d+\.txt$')
+DATE_PATTERN = re.compile(r'^\d{8}$')
+
+
+def find_raw_logs(root_directory):
+    """Returns all raw drifter logs below `root_directory`, sorted by path."""
+    raw_logs = []
+    for directory, _, file_names in os.walk(root_directory):
+        raw_logs.extend(os.path.join(directory, name) for name in file_names if RAW_LOG_PATTERN.match(name))
+    return sorted(raw_logs)
+
+
+def output_directory_for(input_file_path, root_directory, output_root_directory):
+    """Maps a raw log to <output_root>/<date>/<sensor>/<file>."""
+    parts = os.path.relpath(input_file_path, root_directory).split(os.sep)
+    file_name = parts[-1]
+    date_folder = next((part for part in parts[:-1] if DATE_PATTERN.match(part)), parts[0])
+    sensor_folder = file_name[:3]
+    return os.path.join(output_root_directory, date_folder, sensor_folder, file_name)
+
+
+def _screen_one(input_file_path, output_directory, window_size, k, export_tsv, digest):
+    start = time.perf_counter()
+    try:
+        summary = screen_file(input_file_path, output_directory, window_size, k,
+                              export_tsv=export_tsv, digest=digest)
+        summary['status'] = 'ok'
+    except Exception as e:
+        summary = {'status': 'failed', 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()}
+    summary['file'] = input_file_path
+    summary['output_directory'] = output_directory
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def _outputs(output_directory):
+    return [os.path.join(output_directory, name) for name in (ROI_FILE, 'filtered_pressure1.txt', 'filtered_pressure2.txt')]
+
+
+def run_batch(root_directory, output_root_directory, window_size=50, k=2, max_workers=None, force=False,
+              export_tsv=False):
+    raw_logs = find_raw_logs(root_directory)
+    print(f"Found {len(raw_logs)} raw logs below {root_directory}")
+
+    # skip files whose content, parameters and outputs did not change since the last run
+    manifest_path = os.path.join(output_root_directory, 'screening_manifest.json')
+    manifest = load_manifest(manifest_path)
+    parameters = {'window_size': window_size, 'k': k, 'export_tsv': export_tsv}
+    results = []
+    pending = {}
+    for path in raw_logs:
+        digest = file_digest(path)
+        entry = manifest.get(os.path.abspath(path))
+        if not force and is_up_to_date(entry, digest, parameters):
+            results.append(dict(entry['summary'], status='skipped', file=path, seconds=0.0))
+        else:
+            pending[path] = digest
+    print(f"{len(results)} files unchanged since the last run, {len(pending)} to screen")
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(_screen_one, path, output_directory_for(path, root_directory, output_root_directory),
+                            window_size, k, export_tsv, digest): path
+            for path, digest in pending.items()
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker itself died (e.g. BrokenProcessPool); keep the rows finished so far
+                path = futures[future]
+                result = {'status': 'failed', 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc(),
+                          'file': path, 'output_directory': output_directory_for(path, root_directory,
+                                                                                 output_root_directory),
+                          'seconds': 0.0}
+            results.append(result)
+            if result['status'] == 'ok':
+                outputs = [output for output in _outputs(result['output_directory']) if os.path.exists(output)]
+                summary = {key: value for key, value in result.items() if key not in ('status', 'seconds')}
+                record(manifest, result['file'], pending[result['file']], parameters, outputs, summary)
+                save_manifest(manifest_path, manifest)  # saved after every file, so an aborted run keeps its progress
+                verdict = 'useful' if result['useful'] else 'less than 5 minutes'
+                print(f"{result['file']}: {result['seconds']:.1f} s ({verdict})")
+            else:
+                print(f"{result['file']}: FAILED after {result['seconds']:.1f} s\n{result.pop('traceback')}")
+
+    report = pd.DataFrame(results)
+    if len(report):
+        report = report.sort_values('file')
+        os.makedirs(output_root_directory, exist_ok=True)
+        report_path = os.path.join(output_root_directory, 'screening_report.csv')
+        report.to_csv(report_path, index=False)
+        n_failed = (report['status'] == 'failed').sum()
+        n_skipped = (report['status'] == 'skipped').sum()
+        print(f"Screened {len(report) - n_failed - n_skipped} files, skipped {n_skipped}, {n_failed} failed, "
+              f"{report['seconds'].sum():.1f} s of work. Report saved to {report_path}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Screen every raw log below a dataset root in parallel.')
+    parser.add_argument('dataset_root', nargs='?', default=dataset_root)
+    parser.add_argument('output_root', nargs='?', default=output_root)
+    parser.add_argument('--window-size', type=int, default=50, help='rolling variance window (samples)')
+    parser.add_argument('--k', type=float, default=2, help='threshold multiplier for the rolling variance std')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='rescreen files even if the manifest says they are unchanged')
+    parser.add_argument('--export-tsv', action='store_true', help='also write the full filtered_pressure{1,2}.txt files')
+    args = parser.parse_args()
+    run_batch(args.dataset_root, args.output_root, args.window_size, args.k, args.workers, args.force, args.export_tsv)
@@ -0,0 +1,96 @@
+"""
+Script: live_screening.py
+
+Description:
+Screens drifter telemetry while it arrives instead of after the deployment.
+Raw log lines (the comma separated M-file format) are read from standard
+input or from a local TCP socket standing in for the drifter link, and ROI
+start/end events for pressure1 and pressure2 are printed as soon as they are
+detected (see `drifter/online.py`). Lines that cannot be parsed are skipped,
+like `on_bad_lines='skip'` does for the offline scripts.
+
+Usage:
+    tail -f M210713161036.txt | python cleaning/live_screening.py
+    python cleaning/live_screening.py --port 5005      # then stream lines to localhost:5005
+"""
+
+import argparse
+import os
+import socket
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.online import OnlineROIDetector
+
+PRESSURE_FIELDS = {'pressure1': 1, 'pressure2': 3}  # positions in the raw line
+
+
+def read_lines(port=None, host='127.0.0.1'):
+    """Yields text lines from stdin, or from the first client connecting to `host:port`."""
+    if port is None:
+        yield from sys.stdin
+        return
+    with socket.create_server((host, port)) as server:
+        print(f"Waiting for telemetry on {host}:{port}")
+        connection, address = server.accept()
+        print(f"Receiving from {address[0]}:{address[1]}")
+        with connection, connection.makefile('r', encoding='ISO-8859-1', errors='replace') as stream:
+            yield from stream
+
+
+def parse_line(line):
+    """Returns (time, {pressure: value}) or None for a bad line."""
+    fields = line.strip().split(',')
+    if len(fields) < 17:
+        return None
+    try:
+        return float(fields[0]), {name: float(fields[i]) for name, i in PRESSURE_FIELDS.items()}
+    except ValueError:
+        return None
+
+
+def main(args):
+    detectors = {name: OnlineROIDetector(args.window_size, args.k, end_hold=args.end_hold,
+                                         confirm=args.confirm)
+                 for name in PRESSURE_FIELDS}
+    roi_span = {name: None for name in PRESSURE_FIELDS}
+    t_1 = None
+
+    def report(name, event):
+        start, end = roi_span[name] or (event.time, event.time)
+        roi_span[name] = (min(start, event.time), max(end, event.time))
+        print(f"{name}: ROI {event.kind} at {(event.time - t_1) * 0.001:.2f} s "
+              f"(variance {event.variance:.4g}, threshold {event.threshold:.4g})", flush=True)
+
+    for line in read_lines(args.port):
+        parsed = parse_line(line)
+        if parsed is None:
+            continue
+        time, pressures = parsed
+        if t_1 is None:
+            t_1 = time
+        for name, detector in detectors.items():
+            for event in detector.update(time, pressures[name]):
+                report(name, event)
+
+    for name, detector in detectors.items():
+        for event in detector.close():
+            report(name, event)
+        if roi_span[name] is None:
+            print(f"{name}: no region of interest detected")
+        else:
+            minutes = (roi_span[name][1] - roi_span[name][0]) * 0.001 / 60
+            verdict = 'sufficient data' if minutes >= 5 else 'less than 5 minutes'
+            print(f"{name}: ROI spans {minutes:.1f} minutes ({verdict})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Detect ROIs in live drifter telemetry.')
+    parser.add_argument('--port', type=int, default=None, help='listen on this local TCP port instead of stdin')
+    parser.add_argument('--window-size', type=int, default=50, help='rolling variance window (samples)')
+    parser.add_argument('--k', type=float, default=2, help='threshold multiplier for the rolling variance std')
+    parser.add_argument('--end-hold', type=int, default=500,
+                        help='samples below the threshold before a ROI is closed (bounds the end latency)')
+    parser.add_argument('--confirm', type=int, default=None,
+                        help='samples above the threshold before a ROI is reported (default 2 * window size)')
+    main(parser.parse_args())
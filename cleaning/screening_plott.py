@@ -1,104 +1,42 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.io import read_drifter_log
+from drifter.roi import write_roi_descriptor
+from drifter.screening import BackgroundWriter, filter_roi, roi_descriptors, screen_log
 
 sns.set(style="darkgrid")
 input_file_path = 'H:/Rida/Dataset/13072021/M21/M210713161036.txt' # here define the path to the data file
 output_directory = 'H:/Rida/new_data/13072021/M21/M210713161036.txt' # define the desired output directory
-# here define column names for the dataset (first 17 columns)
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-# read the data into a DataFrame 
-data_file = pd.read_csv(
-    input_file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],  
-    engine='python',
-    usecols=range(17),  
-    on_bad_lines='skip',
-    encoding='ISO-8859-1'
-)
-
-# replacing invalid entries with NaN and convert columns to numeric
-data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
-
-# here convert 'time' to seconds and minutes based on the first timestamp
-t_1 = data_file['time'].iloc[0]  # First time value
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001  # Convert to seconds
-data_file['time_minutes'] = data_file['time_seconds'] / 60  # Convert to minutes
-
-# calculate the rolling variance
-window_size = 50  
-data_file['rolling_variance1'] = data_file['pressure1'].rolling(window=window_size).var()
-data_file['rolling_variance2'] = data_file['pressure2'].rolling(window=window_size).var()
+window_size = 50  # rolling variance window
 k = 2  #multiplier for sensitivity
-
-# threshold for pressure1 and pressure2
-rolling_mean1 = data_file['rolling_variance1'].mean()
-rolling_std1 = data_file['rolling_variance1'].std()
-threshold1 = rolling_mean1 + k * rolling_std1
-
-rolling_mean2 = data_file['rolling_variance2'].mean()
-rolling_std2 = data_file['rolling_variance2'].std()
-threshold2 = rolling_mean2 + k * rolling_std2
-
-# here filtering the dataset to include only regions with high variance
-roi_data1 = data_file[data_file['rolling_variance1'] > threshold1]
-roi_data2 = data_file[data_file['rolling_variance2'] > threshold2]
-
-# here function is defined to filter data based on ROI start and end times and save to a specified directory
-def save_filtered_data(data_file, roi_data, time_column, output_directory, output_filename):
-    os.makedirs(output_directory, exist_ok=True)
-    output_file = os.path.join(output_directory, output_filename)
-    roi_data = roi_data.sort_values(by=time_column) # Sort ROI data by time
-
-    # Get start and end times
-    start_time = roi_data[time_column].iloc[0]
-    end_time = roi_data[time_column].iloc[-1]
-    filtered_data = data_file[(data_file[time_column] >= start_time) & (data_file[time_column] <= end_time)]
-    filtered_data.to_csv(output_file, index=False, sep='\t')  # Save as tab-separated values
-    print(f"Filtered data saved to {output_file}")
-
-# Save data filtered by ROI for pressure1
-save_filtered_data(data_file, roi_data1, 'time', output_directory, 'filtered_pressure1.txt')
-
-# Save data filtered by ROI for pressure2
-save_filtered_data(data_file, roi_data2, 'time', output_directory, 'filtered_pressure2.txt')
-
-# Plot filtered pressure data
-filtered_file_path = os.path.join(output_directory, 'filtered_pressure1.txt')
-
-# Define column names for the filtered dataset
-filtered_column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz',
-    'time_seconds', 'time_minutes', 'rolling_variance1', 'rolling_variance2'
-]
-
-# Read the filtered data into a DataFrame
-filtered_data = pd.read_csv(
-    filtered_file_path,
-    delimiter='\t',  
-    names=filtered_column_names,  
-    header=0,  
-    usecols=['time', 'pressure1', 'pressure2'],  
-    na_values=['', ' '],  
-    engine='python'
-)
+write_outputs = True  # set to False to only plot and check the ROI without writing anything
+export_tsv = False  # also write the full filtered_pressure1.txt/filtered_pressure2.txt copies
+
+# read the data into a DataFrame, invalid entries are replaced with NaN
+data_file = read_drifter_log(input_file_path)
+
+# adds time_seconds/time_minutes and the rolling variance of both pressures,
+# then finds the time range where the variance exceeds mean + k * std
+roi_bounds = screen_log(data_file, window_size, k)
+
+# the ROI rows stay in memory for plotting; on disk the ROIs are kept as a small
+# roi.json (source file, start/end row, parameters), TSV files only on request
+filtered_pressure1 = filter_roi(data_file, roi_bounds['pressure1'])
+filtered_pressure2 = filter_roi(data_file, roi_bounds['pressure2'])
+writer = BackgroundWriter()
+if write_outputs:
+    descriptor_path = write_roi_descriptor(output_directory, input_file_path, roi_descriptors(data_file, roi_bounds),
+                                           {'window_size': window_size, 'k': k})
+    print(f"ROI descriptor saved to {descriptor_path}")
+if write_outputs and export_tsv:
+    writer.save(filtered_pressure1, os.path.join(output_directory, 'filtered_pressure1.txt'))
+    writer.save(filtered_pressure2, os.path.join(output_directory, 'filtered_pressure2.txt'))
+
+# Plot filtered pressure data (the pressure1 ROI)
+filtered_data = filtered_pressure1[['time', 'pressure1', 'pressure2']].copy()
 
 # reset time to start from zero in the filtered data
 filtered_t0 = filtered_data['time'].iloc[0]
@@ -129,6 +67,7 @@ if filtered_data['time_minutes'].max() < 5:
 else:
     print("The plot contains sufficient data for analysis.")
 
+writer.wait()  # make sure the filtered files are on disk before exiting
 print("Data processing and visualization complete.")
 
 
@@ -0,0 +1,92 @@
+"""
+Script: threshold_sweep.py
+
+Description:
+Shows how sensitive the screening is to the threshold multiplier `k`
+(threshold = mean + k * std of the rolling variance) before a value is fixed
+in `screening_plott.py` / `batch_screening.py`. For every raw log below the
+dataset root (or for the files given with --files) the rolling variance is
+computed once and all k values are evaluated on it. Files are processed in
+parallel, one process per available core.
+
+The table <output_root>/k_sweep.csv has one row per file, k and sensor with
+the ROI start/end (seconds from the start of the log), the retained minutes
+and the `< 5 minutes` usefulness verdict. A pivot of the number of useful
+files per k is printed at the end.
+
+Usage:
+    python cleaning/threshold_sweep.py [dataset_root] [output_root] [--k 0.5 1 1.5 2 3] [--window-size 50]
+"""
+
+import argparse
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.screening import sweep_file
+from batch_screening import find_raw_logs
+
+dataset_root = 'H:/Rida/Dataset'
+output_root = 'H:/Rida/new_data'
+k_values = [0.5, 1, 1.5, 2, 2.5, 3, 4, 5]
+
+
+def _sweep_one(input_file_path, k_values, window_size):
+    try:
+        rows = sweep_file(input_file_path, k_values, window_size)
+    except Exception as e:
+        print(f"{input_file_path}: FAILED\n{traceback.format_exc()}")
+        rows = [{'k': np.nan, 'error': f'{type(e).__name__}: {e}'}]
+    return [dict(row, file=input_file_path) for row in rows]
+
+
+def run_sweep(input_files, output_root_directory, k_values=k_values, window_size=50, max_workers=None):
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_sweep_one, path, k_values, window_size): path for path in input_files}
+        for future in as_completed(futures):
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                # the worker itself died (e.g. BrokenProcessPool); keep the rows finished so far
+                path = futures[future]
+                print(f"{path}: FAILED\n{traceback.format_exc()}")
+                rows.append({'k': np.nan, 'error': f'{type(e).__name__}: {e}', 'file': path})
+
+    table = pd.DataFrame(rows)
+    if not len(table):
+        print("No raw logs found")
+        return table
+    # without a sensor column every file failed
+    screened_any = 'sensor' in table
+    table = table.sort_values(['file', 'sensor', 'k'] if screened_any else ['file'])
+    os.makedirs(output_root_directory, exist_ok=True)
+    table_path = os.path.join(output_root_directory, 'k_sweep.csv')
+    table.to_csv(table_path, index=False)
+
+    if screened_any:
+        screened = table.dropna(subset=['k'])
+        print(f"Useful files per k (of {screened['file'].nunique()}):")
+        print(screened.pivot_table(index='k', columns='sensor', values='useful', aggfunc='sum'))
+    else:
+        print("No file could be screened")
+    print(f"Table saved to {table_path}")
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate several screening thresholds k in one pass per file.')
+    parser.add_argument('dataset_root', nargs='?', default=dataset_root)
+    parser.add_argument('output_root', nargs='?', default=output_root)
+    parser.add_argument('--files', nargs='+', default=None, help='sweep these logs instead of searching dataset_root')
+    parser.add_argument('--k', type=float, nargs='+', default=k_values, help='threshold multipliers to evaluate')
+    parser.add_argument('--window-size', type=int, default=50, help='rolling variance window (samples)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all cores)')
+    args = parser.parse_args()
+    input_files = args.files or find_raw_logs(args.dataset_root)
+    run_sweep(input_files, args.output_root, args.k, args.window_size, args.workers)
@@ -23,80 +23,30 @@ sensor stalling during deployment.
 """
 
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import numpy as np
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.intervals import durations
+from drifter.stall import detect_stalls, detect_stalls_multiscale
+from drifter.roi import load_screened
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
 
 sns.set(style="darkgrid")
 
+# either an exported filtered_pressure1.txt or the roi.json written by the screening
 file_path = 'H:/Rida/Kongsvegen_data/Screened_data/18072021/M24/M24-0718173840.txt/filtered_pressure1.txt'
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-
-# rotation matrix
-R_body_to_global = np.array([
-    [0, 1, 0],
-    [-1, 0, 0],
-    [0, 0, -1]
-])
-
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter='\t',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    skiprows=1
-)
-
-data_file.replace('�', pd.NA, inplace=True)  # clean invalid values
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+
+# memory-map only the channels used below (the file is parsed once, then served from the cache;
+# a roi.json is resolved against the cached raw log)
+data_file = load_screened(file_path, ['time', 'pressure1', 'pressure2', 'accx', 'accy', 'accz'])
 
 # time convertion to secs and minutes
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
-
-# drop rows with NaNs in critical columns
-data_file.dropna(subset=['accx', 'accy', 'accz'], inplace=True)
-
-# here function is defiend to rotate acceleration data into global frame
-def rotate_acceleration(accx, accy, accz, R_body_to_global):
-    acc_body = np.array([accx, accy, accz])  # original body-frame
-    acc_global = R_body_to_global @ acc_body
-    return acc_global
-
-# applying the rotation to the acceleration data in the DataFrame
-data_file[['X_forward', 'Y_lateral', 'Z_upward']] = data_file.apply(
-    lambda row: rotate_acceleration(row['accx'], row['accy'], row['accz'], R_body_to_global), axis=1, result_type="expand"
-)
-
-# Kalman filter
-def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
-    x = initial_state
-    P = initial_covariance
-    filtered_data = []
-
-    for z in accel_data:
-        x_pred = x
-        P_pred = P + process_variance
-        K = P_pred / (P_pred + measurement_variance)
-        x = x_pred + K * (z - x_pred)
-        P = (1 - K) * P_pred
-        filtered_data.append(x)
-    
-    return np.array(filtered_data)
+add_time_columns(data_file)
+
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
 
 # example global acceleration data
 accel_data_x = data_file['X_forward'].values
@@ -106,42 +56,24 @@ accel_data_z = data_file['Z_upward'].values
 # apply Kalman filter
 process_variance = 1e-4
 measurement_variance = 0.05
-filtered_accel_x = kalman_filter(accel_data_x, process_variance, measurement_variance)
-filtered_accel_y = kalman_filter(accel_data_y, process_variance, measurement_variance)
-filtered_accel_z = kalman_filter(accel_data_z, process_variance, measurement_variance)
-
-# compute rolling variance for filtered_accel_x
-window_size = 100  # Rolling window size
-rolling_variance = pd.Series(filtered_accel_x).rolling(window=window_size).var()
-
-# identify regions where rolling variance is below threshold (e.g., 10% of the maximum variance)
-variance_threshold = 0.01 * rolling_variance.max()
-flat_regions = rolling_variance[rolling_variance < variance_threshold]
-
-# adding a condition to check the duration of flat regions
-# and mark if duration is greater than or equal to 1 second
+# the three axes are filtered together
+filtered_accel_x, filtered_accel_y, filtered_accel_z = smooth_acceleration(
+    data_file, process_variance, measurement_variance).T
 
+# flat regions: rolling variance of filtered_accel_x below 1% of its maximum
+# for at least 3 seconds (same detector as data_analysis/batch_stall.py)
+window_size = 100  # Rolling window size (samples), or a time window such as '1s' for logs with dropped rows
 time_threshold = 3 # 3 second duration for the flat region
-hatch_regions = []
-
-# find the indices of the flat regions
-start_idx = None
-for i in range(1, len(flat_regions)):
-    if flat_regions.index[i] - flat_regions.index[i-1] == 1:
-        if start_idx is None:
-            start_idx = flat_regions.index[i-1]
-        if i == len(flat_regions) - 1:
-            end_idx = flat_regions.index[i]
-            duration = data_file['time_seconds'][end_idx] - data_file['time_seconds'][start_idx]
-            if duration >= time_threshold:  # include only if duration is >= 1 second
-                hatch_regions.append((start_idx, end_idx))
-    else:
-        if start_idx is not None:
-            end_idx = flat_regions.index[i-1]
-            duration = data_file['time_seconds'][end_idx] - data_file['time_seconds'][start_idx]
-            if duration >= time_threshold:  # include only if duration is >= 1 second
-                hatch_regions.append((start_idx, end_idx))
-        start_idx = None
+# positions into the arrays, the index has gaps after dropping rows
+time_seconds = data_file['time_seconds'].to_numpy()
+hatch_regions = detect_stalls(filtered_accel_x, time_seconds, window_size, 0.01, time_threshold)
+# multi-scale alternative to tuning window_size by hand: the stalls most of these windows agree on
+windows = None  # e.g. [50, 100, 200, 400]
+if windows:
+    multiscale = detect_stalls_multiscale(filtered_accel_x, time_seconds, windows, 0.01, time_threshold)
+    for window, intervals in multiscale.per_scale.items():
+        print(f"Window {window}: {len(intervals)} flat regions")
+    hatch_regions = multiscale.consensus
 
 # plotting with 3 subplots for X, Y, and Z acceleration
 fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(16, 12), sharex=True)
@@ -150,7 +82,7 @@ fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(16, 12), sharex=True)
 ax1.plot(data_file['time_seconds'], accel_data_x, label='Forward acceleration (unfiltered)', color='blue', alpha=0.5)
 ax1.plot(data_file['time_seconds'], filtered_accel_x, label='Forward acceleration (filtered)', color='black', alpha=0.8)
 for start_idx, end_idx in hatch_regions:
-    ax1.axvspan(data_file['time_seconds'][start_idx], data_file['time_seconds'][end_idx], color='gray', alpha=0.3, hatch='//')
+    ax1.axvspan(time_seconds[start_idx], time_seconds[end_idx], color='gray', alpha=0.3, hatch='//')
 ax1.set_ylabel('Acceleration X [$m/s^2$]' ,  fontsize=20)
 #ax1.set_title('Filtered Acceleration X with Flat Regions (≥ 1 second)')
 ax1.legend(loc='upper right' ,  fontsize=14)
@@ -160,7 +92,7 @@ ax1.tick_params(axis='both', labelsize=20)  # Increase tick label size
 ax2.plot(data_file['time_seconds'], accel_data_y, label='Lateral acceleration (unfiltered)', color='purple', alpha=0.5)
 ax2.plot(data_file['time_seconds'], filtered_accel_y, label='Lateral acceleration (filtered)', color='black', alpha=0.8)
 for start_idx, end_idx in hatch_regions:
-    ax2.axvspan(data_file['time_seconds'][start_idx], data_file['time_seconds'][end_idx], color='gray', alpha=0.3, hatch='//')
+    ax2.axvspan(time_seconds[start_idx], time_seconds[end_idx], color='gray', alpha=0.3, hatch='//')
 ax2.set_ylabel('Acceleration Y [$m/s^2$]',  fontsize=20)
 #ax2.set_title('Filtered vs Unfiltered Acceleration Y')
 ax2.legend(loc='upper right' ,  fontsize=14)
@@ -170,7 +102,7 @@ ax2.tick_params(axis='both', labelsize=20)  # Increase tick label size
 ax3.plot(data_file['time_seconds'], accel_data_z, label='Upward acceleration (unfiltered)', color='teal', alpha=0.5)
 ax3.plot(data_file['time_seconds'], filtered_accel_z, label='Upward acceleration (filtered)', color='black', alpha=0.8)
 for start_idx, end_idx in hatch_regions:
-    ax3.axvspan(data_file['time_seconds'][start_idx], data_file['time_seconds'][end_idx], color='gray', alpha=0.3, hatch='//')
+    ax3.axvspan(time_seconds[start_idx], time_seconds[end_idx], color='gray', alpha=0.3, hatch='//')
 ax3.set_xlabel('Time [seconds]',  fontsize=20)
 ax3.set_ylabel('Acceleration Z [$m/s^2$]' ,  fontsize=20)
 #ax3.set_title('Filtered vs Unfiltered Acceleration Z')
@@ -190,8 +122,8 @@ ax_pressure.plot(data_file['time_seconds'], data_file['pressure2'], label='Press
 # add the same hatch regions from acceleration to pressure plot
 for start_idx, end_idx in hatch_regions:
     ax_pressure.axvspan(
-        data_file['time_seconds'][start_idx],
-        data_file['time_seconds'][end_idx],
+        time_seconds[start_idx],
+        time_seconds[end_idx],
         color='gray',
         alpha=0.3,
         hatch='//'
@@ -210,10 +142,7 @@ num_frozen_events = len(hatch_regions)
 print(f"Total number of times the sensor was frozen (flat regions): {num_frozen_events}")
 
 # 2. total time the sensor was frozen
-total_frozen_time = sum(
-    data_file['time_seconds'][end] - data_file['time_seconds'][start]
-    for start, end in hatch_regions
-)
+total_frozen_time = durations(hatch_regions, time_seconds).sum()
 print(f"Total time the sensor was frozen: {total_frozen_time:.2f} seconds")
 
 # 3. total deployment time
@@ -221,5 +150,3 @@ deployment_duration = data_file['time_seconds'].iloc[-1] - data_file['time_secon
 print(f"Total deployment time: {deployment_duration:.2f} seconds")
 
 
-
-
@@ -19,79 +19,30 @@ Note:
 """
 
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.roi import load_screened
+from drifter.pools import detect_pools_dual
+from drifter.steps import detect_steps
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
 
 sns.set(style="darkgrid")
+# either an exported filtered_pressure1.txt or the roi.json written by the screening
 file_path = 'H:/Rida/Kongsvegen_data/Screened_data/18072021/M04/M040718173701.txt/filtered_pressure1.txt'
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
 
-R_body_to_global = np.array([
-    [0, 1, 0],
-    [-1, 0, 0],
-    [0, 0, -1]
-])
+# read the data, reruns memory-map the needed channels from the cache
+data_file = load_screened(file_path, ['time', 'pressure1', 'pressure2', 'accx', 'accy', 'accz'])
 
-# read the data
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter='\t',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    skiprows=1
-)
-
-data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
-
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
+add_time_columns(data_file)
 
-data_file.dropna(subset=['accx', 'accy', 'accz'], inplace=True)
-
-# rotation function
-def rotate_acceleration(accx, accy, accz, R_body_to_global):
-    acc_body = np.array([accx, accy, accz])
-    acc_global = R_body_to_global @ acc_body
-    return acc_global
-
-# apply rotation
-data_file[['X_forward', 'Y_lateral', 'Z_upward']] = data_file.apply(
-    lambda row: rotate_acceleration(row['accx'], row['accy'], row['accz'], R_body_to_global),
-    axis=1, result_type="expand"
-)
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
 
 # Kalman filter
-def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
-    x = initial_state
-    P = initial_covariance
-    filtered_data = []
-
-    for z in accel_data:
-        x_pred = x
-        P_pred = P + process_variance
-        K = P_pred / (P_pred + measurement_variance)
-        x = x_pred + K * (z - x_pred)
-        P = (1 - K) * P_pred
-        filtered_data.append(x)
-
-    return np.array(filtered_data)
-
 accel_data_x = data_file['X_forward'].values
 accel_data_y = data_file['Y_lateral'].values
 accel_data_z = data_file['Z_upward'].values
@@ -99,33 +50,19 @@ accel_data_z = data_file['Z_upward'].values
 process_variance = 1e-4
 measurement_variance = 0.05
 
-filtered_accel_x = kalman_filter(accel_data_x, process_variance, measurement_variance)
-filtered_accel_y = kalman_filter(accel_data_y, process_variance, measurement_variance)
-filtered_accel_z = kalman_filter(accel_data_z, process_variance, measurement_variance)
+# the three axes are filtered together
+filtered_accel_x, filtered_accel_y, filtered_accel_z = smooth_acceleration(
+    data_file, process_variance, measurement_variance).T
 
 
 # Parameters
 Z_THRESHOLD = 5  #  (lower = more sensitive)
 MIN_STEP_DURATION = 5  # Minimum samples to count as a step
 
-# detect steps where filtered_accel_z < Z_THRESHOLD
-z_low = filtered_accel_z < Z_THRESHOLD
-z_low_indices = np.where(z_low)[0]
-
-# group consecutive low-Z periods (steps)
-steps = []
-if len(z_low_indices) > 0:
-    current_step = [z_low_indices[0]]
-    for i in range(1, len(z_low_indices)):
-        if z_low_indices[i] - z_low_indices[i-1] == 1:  # Consecutive samples
-            current_step.append(z_low_indices[i])
-        else:
-            if len(current_step) >= MIN_STEP_DURATION:
-                steps.append((current_step[0], current_step[-1]))
-            current_step = [z_low_indices[i]]
-    # add the last step if valid
-    if len(current_step) >= MIN_STEP_DURATION:
-        steps.append((current_step[0], current_step[-1]))
+# detect steps where filtered_accel_z < Z_THRESHOLD (consecutive low-Z periods),
+# with the duration, minimum Z and integrated Z of every step
+steps, step_duration, step_min_z, step_integrated_z = detect_steps(
+    filtered_accel_z, Z_THRESHOLD, MIN_STEP_DURATION, data_file['time_seconds'].to_numpy())
 
 
 # updated parameters for region detection
@@ -136,82 +73,11 @@ MIN_REGION_DURATION = 0.001  # minimum consecutive samples to form a region
 def detect_high_pressure_regions_dual(pressure1, pressure2, window_size=WINDOW_SIZE,
                                     threshold=PRESSURE_THRESHOLD, min_duration=MIN_REGION_DURATION):
     """Detects high-pressure regions in BOTH sensors and merges overlapping regions."""
-    def _detect_single(pressure_data):
-        # calculate baseline and dynamic threshold
-        baseline = np.mean(pressure_data)
-        print(f"Mean pressure: {baseline}")  # Print the mean pressure
-        dynamic_threshold = baseline + threshold
-
-        # for smoothing the data
-        smoothed = pd.Series(pressure_data).rolling(window=window_size, center=True).mean().values
-
-        # find where pressure crosses threshold
-        above_threshold = smoothed > dynamic_threshold
-
-        # detect regions
-        regions = []
-        in_region = False
-        start_idx = 0
-
-        for i in range(len(above_threshold)):
-            if above_threshold[i] and not in_region:
-                # find where the rise begins (look backward to baseline)
-                look_back = max(0, i - window_size * 2)
-                for j in range(i, look_back, -1):
-                    if smoothed[j] <= baseline:
-                        start_idx = j
-                        break
-                else:
-                    start_idx = i
-                in_region = True
-
-            elif not above_threshold[i] and in_region:
-                # find where pressure returns to baseline (look forward)
-                look_forward = min(len(smoothed), i + window_size * 2)
-                for j in range(i, look_forward):
-                    if smoothed[j] <= baseline:
-                        end_idx = j
-                        break
-                else:
-                    end_idx = i
-
-                if (end_idx - start_idx) >= min_duration:
-                    regions.append((start_idx, end_idx))
-                in_region = False
-
-        # handle region continuing to end of data
-        if in_region and (len(smoothed) - start_idx) >= min_duration:
-            look_back = max(0, len(smoothed) - window_size * 2)
-            for j in range(len(smoothed)-1, look_back, -1):
-                if smoothed[j] <= baseline:
-                    end_idx = j
-                    break
-            else:
-                end_idx = len(smoothed)
-            regions.append((start_idx, end_idx))
-
-        return regions
-
-    # detect regions in both sensors
-    regions1 = _detect_single(pressure1)
-    regions2 = _detect_single(pressure2)
-
-    # combine and merge overlapping regions
-    all_regions = regions1 + regions2
-    all_regions.sort()
-
-    pools = []
-    if all_regions:
-        current_start, current_end = all_regions[0]
-        for start, end in all_regions[1:]:
-            if start <= current_end + window_size:  # merge if regions are close
-                current_end = max(current_end, end)
-            else:
-                pools.append((current_start, current_end))
-                current_start, current_end = start, end
-        pools.append((current_start, current_end))
-
-    return pools
+    for pressure_data in (pressure1, pressure2):
+        print(f"Mean pressure: {np.mean(pressure_data)}")  # Print the mean pressure
+    # baseline = mean pressure, regions above baseline + threshold extended to
+    # where the pressure leaves/returns to the baseline (see drifter/pools.py)
+    return detect_pools_dual(pressure1, pressure2, window_size, threshold, min_duration)
 
 # detect high-pressure regions (now using the dual-sensor function)
 pools = detect_high_pressure_regions_dual(
@@ -300,7 +166,8 @@ plt.show()
 # print step timings
 print(f"Detected {len(steps)} steps:")
 for i, (start, end) in enumerate(steps):
-    print(f"Step {i+1}: {data_file['time_seconds'].iloc[start]:.2f}s to {data_file['time_seconds'].iloc[end]:.2f}s")
+    print(f"Step {i+1}: {data_file['time_seconds'].iloc[start]:.2f}s to {data_file['time_seconds'].iloc[end]:.2f}s "
+          f"({step_duration[i]:.2f}s, min Z {step_min_z[i]:.2f} m/s^2, integrated Z {step_integrated_z[i]:.2f} m/s)")
 
 # print step timings
 print(f"Detected {len(pools)} pools:")
@@ -1,78 +1,28 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.pools import detect_pools_std, smooth_pressure, std_threshold
+from drifter.steps import detect_steps, step_features
+from drifter.roi import load_screened
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
 
 sns.set(style="darkgrid")
 
 file_path = 'H:/Rida/Kongsvegen_data/Screened_data/18072021/M04/M040718173701.txt/filtered_pressure1.txt'
 
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-
-R_body_to_global = np.array([
-    [0, 1, 0],
-    [-1, 0, 0],
-    [0, 0, -1]
-])
-
 # Read the data
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter='\t',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    skiprows=1
-)
-
-data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+data_file = load_screened(file_path, ['time', 'pressure1', 'pressure2', 'accx', 'accy', 'accz'])
 
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
+add_time_columns(data_file)
 
-data_file.dropna(subset=['accx', 'accy', 'accz'], inplace=True)
-
-# Rotation function
-def rotate_acceleration(accx, accy, accz, R_body_to_global):
-    acc_body = np.array([accx, accy, accz])
-    acc_global = R_body_to_global @ acc_body
-    return acc_global
-
-# Apply rotation
-data_file[['X_forward', 'Y_lateral', 'Z_upward']] = data_file.apply(
-    lambda row: rotate_acceleration(row['accx'], row['accy'], row['accz'], R_body_to_global),
-    axis=1, result_type="expand"
-)
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
 
 # Kalman filter
-def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
-    x = initial_state
-    P = initial_covariance
-    filtered_data = []
-
-    for z in accel_data:
-        x_pred = x
-        P_pred = P + process_variance
-        K = P_pred / (P_pred + measurement_variance)
-        x = x_pred + K * (z - x_pred)
-        P = (1 - K) * P_pred
-        filtered_data.append(x)
-
-    return np.array(filtered_data)
-
 accel_data_x = data_file['X_forward'].values
 accel_data_y = data_file['Y_lateral'].values
 accel_data_z = data_file['Z_upward'].values
@@ -80,9 +30,9 @@ accel_data_z = data_file['Z_upward'].values
 process_variance = 1e-4
 measurement_variance = 0.05
 
-filtered_accel_x = kalman_filter(accel_data_x, process_variance, measurement_variance)
-filtered_accel_y = kalman_filter(accel_data_y, process_variance, measurement_variance)
-filtered_accel_z = kalman_filter(accel_data_z, process_variance, measurement_variance)
+# the three axes are filtered together
+filtered_accel_x, filtered_accel_y, filtered_accel_z = smooth_acceleration(
+    data_file, process_variance, measurement_variance).T
 
 # STEP DETECTION
 norm_filtered_accel_z = (filtered_accel_z - np.mean(filtered_accel_z)) / np.std(filtered_accel_z)
@@ -90,21 +40,10 @@ Z_THRESHOLD = np.std(norm_filtered_accel_z) * 1.5
 print(f"Z-Threshold: {Z_THRESHOLD:.2f}")
 MIN_STEP_DURATION = 5
 
-z_low = norm_filtered_accel_z < -Z_THRESHOLD
-z_low_indices = np.where(z_low)[0]
-
-steps = []
-if len(z_low_indices) > 0:
-    current_step = [z_low_indices[0]]
-    for i in range(1, len(z_low_indices)):
-        if z_low_indices[i] - z_low_indices[i-1] == 1:
-            current_step.append(z_low_indices[i])
-        else:
-            if len(current_step) >= MIN_STEP_DURATION:
-                steps.append((current_step[0], current_step[-1]))
-            current_step = [z_low_indices[i]]
-    if len(current_step) >= MIN_STEP_DURATION:
-        steps.append((current_step[0], current_step[-1]))
+# steps on the normalised signal, features (duration, min Z, integrated Z) of the filtered one
+steps, step_duration, step_min_z, step_integrated_z = step_features(
+    detect_steps(norm_filtered_accel_z, -Z_THRESHOLD, MIN_STEP_DURATION).intervals,
+    filtered_accel_z, data_file['time_seconds'].to_numpy())
 
 # POOL DETECTION (Updated: sensor-specific STD)
 WINDOW_SIZE = 2
@@ -118,35 +57,12 @@ def detect_high_pressure_regions_dual(pressure1, pressure2, time_seconds,
     Detects high-pressure regions using each sensor's own STD + median.
     """
 
-    def _detect_single(pressure_data):
-        smoothed = pd.Series(pressure_data).rolling(window=window_size, center=True).mean().values
-        baseline = np.nanmedian(smoothed)
-        std = np.nanstd(smoothed)
-        dynamic_threshold = baseline + std_multiplier * std
+    for pressure_data in (pressure1, pressure2):
+        baseline, std, dynamic_threshold = std_threshold(smooth_pressure(pressure_data, window_size), std_multiplier)
         print(f"Sensor - Median pressure: {baseline:.2f}, STD: {std:.2f}, Threshold: {dynamic_threshold:.2f}")
-        return smoothed > dynamic_threshold
-
-    above_threshold_1 = _detect_single(pressure1)
-    above_threshold_2 = _detect_single(pressure2)
-    combined_threshold = above_threshold_1 | above_threshold_2
-
-
-    regions = []
-    in_region = False
-    start_idx = 0
-
-    for i in range(len(combined_threshold)):
-        if combined_threshold[i] and not in_region:
-            start_idx = i
-            in_region = True
-        elif not combined_threshold[i] and in_region:
-            end_idx = i
-            if (end_idx - start_idx) >= min_duration:
-                regions.append((start_idx, end_idx))
-            in_region = False
 
-    if in_region and (len(combined_threshold) - start_idx) >= min_duration:
-        regions.append((start_idx, len(combined_threshold) - 1))
+    # regions where either sensor is above its threshold (see drifter/pools.py)
+    regions = detect_pools_std(pressure1, pressure2, window_size, std_multiplier, min_duration)
 
     print(f"Detected {len(regions)} high-pressure regions.")
     return regions
@@ -232,7 +148,8 @@ plt.show()
 # Print step timings
 print(f"Detected {len(steps)} steps:")
 for i, (start, end) in enumerate(steps):
-    print(f"Step {i+1}: {data_file['time_seconds'].iloc[start]:.2f}s to {data_file['time_seconds'].iloc[end]:.2f}s")
+    print(f"Step {i+1}: {data_file['time_seconds'].iloc[start]:.2f}s to {data_file['time_seconds'].iloc[end]:.2f}s "
+          f"({step_duration[i]:.2f}s, min Z {step_min_z[i]:.2f} m/s^2, integrated Z {step_integrated_z[i]:.2f} m/s)")
 
 # Print pool timings
 print(f"\nDetected {len(pools)} pools:")
@@ -0,0 +1,104 @@
+"""
+Script: batch_stall.py
+
+Description:
+Runs the stall detection of `Sensor_stall.py` over every screened deployment
+below the output root of `cleaning/batch_screening.py` instead of a single
+hard-coded file. Deployments are processed in parallel, one process per
+available core; failures are recorded without stopping the batch.
+
+The table <output_root>/stall_table.csv has one row per deployment with
+date, sensor, file, n_stalls, stall_seconds and deployment_seconds (and the
+error of failed files). `supported_work/heatmap_stall.py` plots it when given
+its path (by default it plots the checked-in counts of the thesis figure).
+With --windows the stalls are the consensus of several window sizes (see
+`drifter.stall.detect_stalls_multiscale`) and the count of every window is
+added as n_stalls_<window>.
+
+Usage:
+    python data_analysis/batch_stall.py [screened_root] [--output stall_table.csv] [--sensor pressure1]
+                                        [--window-size 100 | --window-size 1s | --windows 50 100 200 400]
+"""
+
+import argparse
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.stall import (STALL_MIN_SECONDS, STALL_VARIANCE_FRACTION, STALL_WINDOW, deployment_of, find_screened,
+                           stall_summary)
+
+screened_root = 'H:/Rida/new_data'
+
+TABLE_COLUMNS = ['date', 'sensor', 'file', 'n_stalls', 'stall_seconds', 'deployment_seconds']
+
+
+def window_argument(value):
+    """A number of samples ('100') or a time window ('1s')."""
+    return int(value) if value.isdigit() else value
+
+
+def _stalls_one(path, root_directory, sensor, window_size, variance_fraction, min_seconds, windows):
+    date, sensor_id, file_name = deployment_of(path, root_directory)
+    row = {'date': date, 'sensor': sensor_id, 'file': file_name}
+    try:
+        row.update(stall_summary(path, sensor, window_size, variance_fraction, min_seconds, windows))
+    except Exception as e:
+        print(f"{path}: FAILED\n{traceback.format_exc()}")
+        row['error'] = f'{type(e).__name__}: {e}'
+    return row
+
+
+def run_stalls(root_directory, table_path=None, sensor='pressure1', window_size=STALL_WINDOW,
+               variance_fraction=STALL_VARIANCE_FRACTION, min_seconds=STALL_MIN_SECONDS, windows=None, max_workers=None):
+    screened = find_screened(root_directory)
+    print(f"Found {len(screened)} screened deployments below {root_directory}")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_stalls_one, path, root_directory, sensor, window_size, variance_fraction,
+                                   min_seconds, windows): path
+                   for path in screened}
+        for future in as_completed(futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                # the worker itself died (e.g. BrokenProcessPool); keep the rows finished so far
+                path = futures[future]
+                print(f"{path}: FAILED\n{traceback.format_exc()}")
+                date, sensor_id, file_name = deployment_of(path, root_directory)
+                rows.append({'date': date, 'sensor': sensor_id, 'file': file_name,
+                             'error': f'{type(e).__name__}: {e}'})
+
+    scale_columns = [f'n_stalls_{window}' for window in sorted(windows or [])]
+    table = pd.DataFrame(rows, columns=TABLE_COLUMNS + scale_columns
+                         + (['error'] if any('error' in row for row in rows) else []))
+    table = table.sort_values(['date', 'sensor', 'file'])
+    table_path = table_path or os.path.join(root_directory, 'stall_table.csv')
+    os.makedirs(os.path.dirname(os.path.abspath(table_path)), exist_ok=True)
+    table.to_csv(table_path, index=False)
+    print(table.to_string(index=False))
+    print(f"Table saved to {table_path}")
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Detect sensor stalls in every screened deployment.')
+    parser.add_argument('screened_root', nargs='?', default=screened_root)
+    parser.add_argument('--output', default=None, help='stall table (default: <screened_root>/stall_table.csv)')
+    parser.add_argument('--sensor', default='pressure1', help='ROI of this pressure sensor (roi.json inputs)')
+    parser.add_argument('--window-size', type=window_argument, default=STALL_WINDOW,
+                        help="rolling variance window, samples or a time window such as '1s'")
+    parser.add_argument('--variance-fraction', type=float, default=STALL_VARIANCE_FRACTION,
+                        help='stall threshold as a fraction of the maximum rolling variance')
+    parser.add_argument('--min-seconds', type=float, default=STALL_MIN_SECONDS, help='shortest stall (seconds)')
+    parser.add_argument('--windows', type=int, nargs='+', default=None,
+                        help='multi-scale mode: count the consensus of these sample windows (e.g. 50 100 200 400)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all cores)')
+    args = parser.parse_args()
+    run_stalls(args.screened_root, args.output, args.sensor, args.window_size, args.variance_fraction,
+               args.min_seconds, args.windows, args.workers)
@@ -3,6 +3,9 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import os
 from glob import glob
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.store import load_channels
 
 root_directory = "H:/Rida/Kongsvegen_data/outlier_removed/"
 # Find all 'filtered_pressure_cleaned.txt' files across subdirectories
@@ -11,16 +14,8 @@ correlation_data = [] # List to store correlation data
 # Iterate through all files and compute correlation
 for file_path in file_paths:
     try:
-        sensor_data = pd.read_csv(
-            file_path,
-            delimiter=',',
-            na_values=['', ' '],
-            engine='python',
-            on_bad_lines='skip',
-            encoding='ISO-8859-1'
-        )
-
-        sensor_data['time'] = pd.to_numeric(sensor_data['time'], errors='coerce')
+        # parsed files are cached per channel, so reruns only map the pressure columns
+        sensor_data = load_channels(file_path, ['time', 'pressure1', 'pressure2'], skiprows=1)
         sensor_data = sensor_data.dropna(subset=['time'])
 
         correlation = sensor_data['pressure1'].corr(sensor_data['pressure2']) # Calculate correlation between pressure1 and pressure2
@@ -0,0 +1,120 @@
+"""
+Script: step_pool_sweep.py
+
+Description:
+Calibrates the hand-tuned constants of `Step_pool.py` / `Step_pool_Update.py`
+(Z_THRESHOLD, MIN_STEP_DURATION, WINDOW_SIZE, PRESSURE_THRESHOLD and
+std_multiplier) on a whole campaign. Every screened deployment below the
+output root of `cleaning/batch_screening.py` is loaded, rotated and Kalman
+filtered once; the whole parameter grid is then evaluated on the cached
+signals with the vectorised detectors (see `drifter/step_pool.py`).
+Deployments are processed in parallel, one process per available core.
+
+The table <screened_root>/step_pool_sweep.csv has one row per deployment and
+parameter combination with n_steps, n_pools and n_pools_std. When the
+reference counts of `supported_work/Bar_plot.py` (step_pool_counts.csv) are
+found, the mean absolute difference of the chosen count per combination is
+written to step_pool_calibration.csv and the best combinations are printed.
+
+Usage:
+    python data_analysis/step_pool_sweep.py [screened_root] [--z-threshold 3 4 5 6 7] [--min-step-duration 3 5 10]
+                                            [--window-size 2 5 10] [--pressure-threshold 5 10 15 20]
+                                            [--std-multiplier 3 4 5 6] [--compare n_steps]
+"""
+
+import argparse
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.stall import deployment_of, find_screened
+from drifter.step_pool import DEFAULT_GRID, evaluate_grid, load_step_pool_signals, parameter_grid
+
+screened_root = 'H:/Rida/new_data'
+reference_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'supported_work', 'step_pool_counts.csv')
+
+
+def _sweep_one(path, root_directory, grid, sensor):
+    date, sensor_id, file_name = deployment_of(path, root_directory)
+    try:
+        table = evaluate_grid(load_step_pool_signals(path, sensor), grid)
+    except Exception as e:
+        print(f"{path}: FAILED\n{traceback.format_exc()}")
+        table = grid.assign(error=f'{type(e).__name__}: {e}')
+    return table.assign(date=date, sensor=sensor_id, file=file_name)
+
+
+def calibrate(table, reference, compare='n_steps'):
+    """Mean absolute difference between `compare` and the reference `Steps` per parameter combination."""
+    reference = reference.assign(file=reference['File'].str.replace(r'\.txt$', '', regex=True))
+    counts = table.assign(file=table['file'].str.replace(r'\.txt$', '', regex=True))
+    matched = counts.merge(reference[['file', 'Steps']], on='file')
+    matched['abs_difference'] = (matched[compare] - matched['Steps']).abs()
+    return (matched.groupby(list(DEFAULT_GRID))
+            .agg(mean_abs_difference=('abs_difference', 'mean'), n_deployments=('file', 'nunique'))
+            .reset_index()
+            .sort_values('mean_abs_difference'))
+
+
+def run_sweep(root_directory, grid, sensor='pressure1', compare='n_steps', reference=reference_path,
+              max_workers=None):
+    screened = find_screened(root_directory)
+    grid = parameter_grid(grid)
+    print(f"Found {len(screened)} screened deployments below {root_directory}, {len(grid)} parameter combinations")
+
+    tables = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_sweep_one, path, root_directory, grid, sensor): path for path in screened}
+        for future in as_completed(futures):
+            try:
+                tables.append(future.result())
+            except Exception as e:
+                # the worker itself died (e.g. BrokenProcessPool); keep the tables finished so far
+                path = futures[future]
+                print(f"{path}: FAILED\n{traceback.format_exc()}")
+                date, sensor_id, file_name = deployment_of(path, root_directory)
+                tables.append(grid.assign(error=f'{type(e).__name__}: {e}', date=date, sensor=sensor_id,
+                                          file=file_name))
+    if not tables:
+        print("No screened deployments found")
+        return pd.DataFrame()
+
+    table = pd.concat(tables, ignore_index=True)
+    leading = ['date', 'sensor', 'file']
+    table = table[leading + [column for column in table.columns if column not in leading]]
+    table = table.sort_values(leading + list(DEFAULT_GRID))
+    os.makedirs(root_directory, exist_ok=True)
+    table_path = os.path.join(root_directory, 'step_pool_sweep.csv')
+    table.to_csv(table_path, index=False)
+    print(f"Table saved to {table_path}")
+
+    if reference and os.path.exists(reference) and compare in table:
+        calibration = calibrate(table.dropna(subset=[compare]), pd.read_csv(reference, dtype={'File': str}), compare)
+        calibration_path = os.path.join(root_directory, 'step_pool_calibration.csv')
+        calibration.to_csv(calibration_path, index=False)
+        print(f"Best parameters for {compare} against {reference}:")
+        print(calibration.head(10).to_string(index=False))
+        print(f"Calibration saved to {calibration_path}")
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate a parameter grid of the step-pool detection.')
+    parser.add_argument('screened_root', nargs='?', default=screened_root)
+    for parameter, values in DEFAULT_GRID.items():
+        parser.add_argument('--' + parameter.replace('_', '-'), type=float, nargs='+', default=values)
+    parser.add_argument('--sensor', default='pressure1', help='ROI of this pressure sensor (roi.json inputs)')
+    parser.add_argument('--compare', default='n_steps', choices=['n_steps', 'n_pools', 'n_pools_std'],
+                        help='count compared with the reference counts')
+    parser.add_argument('--reference', default=reference_path, help='reference counts (File, Steps columns)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all cores)')
+    args = parser.parse_args()
+    grid = {parameter: getattr(args, parameter) for parameter in DEFAULT_GRID}
+    grid['window_size'] = [int(window_size) for window_size in grid['window_size']]
+    grid['min_step_duration'] = [int(duration) for duration in grid['min_step_duration']]
+    run_sweep(args.screened_root, grid, args.sensor, args.compare, args.reference, args.workers)
@@ -0,0 +1,37 @@
+"""
+Shared processing code for the Kongsvegen drifter scripts.
+
+The scripts in `cleaning`, `data_analysis` and `supported_work` import their
+loaders and signal-processing stages from here instead of keeping local copies.
+
+The names below are imported from their modules on first use, not when the
+package is imported, so `python -m drifter.cache` and `python -m drifter.roi`
+run their module only once.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'COLUMN_NAMES': 'drifter.io', 'read_drifter_log': 'drifter.io',
+    'cached_read': 'drifter.cache',
+    'load_channels': 'drifter.store', 'open_store': 'drifter.store', 'write_store': 'drifter.store',
+    'load_screened': 'drifter.roi',
+    'add_time_columns': 'drifter.preprocessing', 'prepare_acceleration': 'drifter.preprocessing',
+    'remove_outliers': 'drifter.preprocessing', 'smooth_acceleration': 'drifter.preprocessing',
+    'add_global_acceleration': 'drifter.frames', 'rotate_to_global': 'drifter.frames',
+    'StreamingKalmanFilter': 'drifter.kalman', 'kalman_filter': 'drifter.kalman',
+    'rolling_stats': 'drifter.rolling', 'rolling_var': 'drifter.rolling',
+    'screen_file': 'drifter.screening', 'screen_log': 'drifter.screening',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,235 @@
+"""
+Content-addressed cache of parsed drifter logs.
+
+Every parsed file is stored once as Feather (or a pickle when pyarrow is not
+installed) under a name made from the SHA-1 of the source bytes, the parser
+version and the read options. Renaming or copying a log therefore reuses the
+cached copy, while editing it or changing the parser gives a new entry.
+
+The cache lives in `~/.cache/drifter` unless `DRIFTER_CACHE_DIR` is set and
+is kept below `DRIFTER_CACHE_MAX_BYTES` (default 5 GB) by dropping the least
+recently used entries. Entries can be removed from the command line:
+
+    python -m drifter.cache info
+    python -m drifter.cache invalidate H:/Rida/Dataset/13072021/M21/M210713161036.txt
+    python -m drifter.cache invalidate --all
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import uuid
+
+import pandas as pd
+
+from drifter.io import PARSER_VERSION, read_drifter_log
+
+CACHE_DIR = os.environ.get('DRIFTER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'drifter'))
+MAX_CACHE_BYTES = int(float(os.environ.get('DRIFTER_CACHE_MAX_BYTES', 5e9)))
+INDEX_FILE = 'index.json'
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'feather'
+except ImportError:
+    CACHE_FORMAT = 'pkl'
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    # written to a temporary file first so parallel workers never see half an index
+    tmp_path = os.path.join(cache_dir, f'{INDEX_FILE}.{uuid.uuid4().hex}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(cache_dir, INDEX_FILE))
+
+
+def file_digest(file_path, cache_dir=None):
+    """
+    Returns the SHA-1 of a file's content.
+
+    The digest is remembered together with the file size and modification
+    time, so unchanged files are not hashed again on the next run.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    source = os.path.abspath(file_path)
+    stat = os.stat(source)
+    index = _load_index(cache_dir)
+    entry = index.get(source)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['digest']
+
+    sha1 = hashlib.sha1()
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    digest = sha1.hexdigest()
+
+    index = _load_index(cache_dir)
+    index[source] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    _save_index(cache_dir, index)
+    return digest
+
+
+def cache_key(file_path, cache_dir=None, **read_options):
+    """Builds the cache entry name for a file and its read options."""
+    options = json.dumps(read_options, sort_keys=True, default=str)
+    options_hash = hashlib.sha1(options.encode()).hexdigest()[:8]
+    return f'{file_digest(file_path, cache_dir)}-p{PARSER_VERSION}-{options_hash}'
+
+
+def _entry_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def _remove_entry(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def cache_entries(cache_dir=None):
+    """Returns (path, size, last_used) for every entry, least recently used first."""
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name == INDEX_FILE or name.endswith('.tmp'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            entries.append((path, _entry_size(path), os.path.getmtime(path)))
+        except OSError:
+            continue  # removed by another process meanwhile
+    return sorted(entries, key=lambda entry: entry[2])
+
+
+def evict(cache_dir=None, max_bytes=None, keep=()):
+    """
+    Drops least recently used entries until the cache fits in `max_bytes`.
+    The entries in `keep` (paths, e.g. the one just written) are never dropped.
+    """
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    keep = {os.path.abspath(path) for path in keep}
+    entries = cache_entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        _remove_entry(path)
+        total -= size
+    return total
+
+
+def invalidate(file_paths=None, cache_dir=None):
+    """
+    Removes the cached copies of the given source files, or everything if no
+    files are given. Returns the number of removed entries.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if file_paths is None:
+        entries = cache_entries(cache_dir)
+        for path, _, _ in entries:
+            _remove_entry(path)
+        _remove_entry(os.path.join(cache_dir, INDEX_FILE))
+        return len(entries)
+
+    index = _load_index(cache_dir)
+    digests = set()
+    for file_path in file_paths:
+        entry = index.pop(os.path.abspath(file_path), None)
+        if entry:
+            digests.add(entry['digest'])
+        elif os.path.exists(file_path):
+            digests.add(file_digest(file_path, cache_dir))
+            index = _load_index(cache_dir)
+            index.pop(os.path.abspath(file_path), None)
+    removed = 0
+    for path, _, _ in cache_entries(cache_dir):
+        if os.path.basename(path).split('-')[0] in digests:
+            _remove_entry(path)
+            removed += 1
+    if os.path.isdir(cache_dir):
+        _save_index(cache_dir, index)
+    return removed
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def cached_read(file_path, cache_dir=None, max_bytes=None, **read_options):
+    """
+    Same as `read_drifter_log(file_path, **read_options)`, but the parsed
+    frame is taken from the cache when this exact file was parsed before.
+    Chunked reads (`chunksize=`) return the chunk iterator of
+    `read_drifter_log` and bypass the cache.
+    """
+    if read_options.get('chunksize') is not None:
+        return read_drifter_log(file_path, **read_options)
+    cache_dir = cache_dir or CACHE_DIR
+    entry = os.path.join(cache_dir, f'{cache_key(file_path, cache_dir, **read_options)}.{CACHE_FORMAT}')
+    if os.path.exists(entry):
+        _touch(entry)  # marks the entry as recently used
+        if CACHE_FORMAT == 'feather':
+            return pd.read_feather(entry)
+        return pd.read_pickle(entry)
+
+    data_file = read_drifter_log(file_path, **read_options)
+    tmp_path = f'{entry}.{uuid.uuid4().hex}.tmp'
+    if CACHE_FORMAT == 'feather':
+        data_file.to_feather(tmp_path)
+    else:
+        data_file.to_pickle(tmp_path)
+    os.replace(tmp_path, entry)
+    evict(cache_dir, max_bytes)
+    return data_file
+
+
+def main(argv):
+    usage = 'usage: python -m drifter.cache (info | invalidate --all | invalidate FILE...)'
+    if not argv or argv[0] not in ('info', 'invalidate'):
+        print(usage)
+        return 1
+    if argv[0] == 'info':
+        entries = cache_entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"Cache directory: {CACHE_DIR}")
+        print(f"{len(entries)} entries, {total / 1e6:.1f} MB of {MAX_CACHE_BYTES / 1e6:.0f} MB")
+        return 0
+    if argv[1:] == ['--all']:
+        removed = invalidate()
+    elif argv[1:]:
+        removed = invalidate(argv[1:])
+    else:
+        print(usage)
+        return 1
+    print(f"Removed {removed} cache entries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
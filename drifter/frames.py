@@ -0,0 +1,73 @@
+"""
+Body-to-global frame rotation of the accelerometer channels.
+
+`accx, accy, accz` are measured in the drifter's body frame. The analysis
+scripts work with `X_forward, Y_lateral, Z_upward`, i.e. `R @ acc_body` for
+every sample. Here that is one (N, 3) @ (3, 3) matrix product for the whole
+log. The rotation of each sensor is read from a JSON config that maps sensor
+ids (`"M04"`) to 3x3 matrices, with a `"default"` entry for all other
+sensors; `rotations.json` next to this module is used unless
+`DRIFTER_ROTATIONS` points to another file. Its default is the rotation all
+scripts used so far (90 degrees around Z with a flip of Z).
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+ACCEL_COLUMNS = ['accx', 'accy', 'accz']
+GLOBAL_COLUMNS = ['X_forward', 'Y_lateral', 'Z_upward']
+
+ROTATION_CONFIG = os.environ.get('DRIFTER_ROTATIONS', os.path.join(os.path.dirname(__file__), 'rotations.json'))
+
+SENSOR_PATTERN = re.compile(r'^(M\d{2})')
+
+
+def sensor_id(file_path):
+    """Sensor id (`'M04'`) of a raw log, screened file or roi.json path, or None."""
+    for part in reversed(re.split(r'[\\/]', os.path.normpath(file_path))):
+        match = SENSOR_PATTERN.match(part)
+        if match:
+            return match.group(1)
+    return None
+
+
+def load_rotations(config_path=None):
+    """Reads the rotation config as {sensor: (3, 3) array}."""
+    with open(config_path or ROTATION_CONFIG, encoding='utf-8') as f:
+        config = json.load(f)
+    rotations = {}
+    for sensor, matrix in config.items():
+        matrix = np.asarray(matrix, dtype='float64')
+        if matrix.shape != (3, 3):
+            raise ValueError(f"rotation for {sensor!r} in {config_path or ROTATION_CONFIG} is not a 3x3 matrix")
+        rotations[sensor] = matrix
+    return rotations
+
+
+def rotation_for(sensor, rotations=None):
+    """Rotation matrix of `sensor` (an id or a file path), falling back to the default entry."""
+    rotations = load_rotations() if rotations is None else rotations
+    if sensor is not None and sensor not in rotations:
+        sensor = sensor_id(sensor)
+    return rotations.get(sensor, rotations['default'])
+
+
+def rotate_to_global(acc_body, R):
+    """Rotates an (N, 3) block of body-frame accelerations; row i becomes `R @ acc_body[i]`."""
+    return np.asarray(acc_body, dtype='float64') @ np.asarray(R, dtype='float64').T
+
+
+def add_global_acceleration(data_file, R=None, sensor=None):
+    """
+    Adds `X_forward`, `Y_lateral` and `Z_upward` to `data_file`.
+
+    `R` defaults to the configured rotation of `sensor` (an id or a file
+    path), or to the default rotation.
+    """
+    if R is None:
+        R = rotation_for(sensor)
+    data_file[GLOBAL_COLUMNS] = rotate_to_global(data_file[ACCEL_COLUMNS].to_numpy(dtype='float64'), R)
+    return data_file
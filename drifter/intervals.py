@@ -0,0 +1,82 @@
+"""
+Run-length intervals of boolean masks (stalls, steps, pools, HMM states).
+
+An interval set is an (K, 2) integer array of `[start, end]` sample
+positions, both ends inclusive, sorted by start. Runs are found from the
+edges of the mask with `np.diff`, so every operation is a few vectorised
+passes over the data instead of a loop over the samples.
+"""
+
+import numpy as np
+
+
+def _as_intervals(intervals):
+    return np.asarray(intervals, dtype='int64').reshape(-1, 2)
+
+
+def mask_to_intervals(mask):
+    """Runs of True in a 1-D mask as an (K, 2) array of inclusive `[start, end]` positions."""
+    edges = np.diff(np.concatenate([[0], np.asarray(mask, dtype=bool).astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return np.column_stack([starts, ends])
+
+
+def intervals_to_mask(intervals, n_samples):
+    """Boolean mask of length `n_samples` that is True inside the intervals."""
+    intervals = _as_intervals(intervals)
+    counts = np.zeros(n_samples + 1, dtype='int64')
+    np.add.at(counts, intervals[:, 0], 1)
+    np.add.at(counts, intervals[:, 1] + 1, -1)
+    return np.cumsum(counts[:-1]) > 0
+
+
+def min_samples(intervals, n_samples):
+    """Keeps the intervals that span at least `n_samples` samples."""
+    intervals = _as_intervals(intervals)
+    return intervals[intervals[:, 1] - intervals[:, 0] + 1 >= n_samples]
+
+
+def min_duration(intervals, times, seconds):
+    """Keeps the intervals with `times[end] - times[start] >= seconds` (e.g. `time_seconds`)."""
+    intervals = _as_intervals(intervals)
+    times = np.asarray(times)
+    return intervals[times[intervals[:, 1]] - times[intervals[:, 0]] >= seconds]
+
+
+def durations(intervals, times):
+    """`times[end] - times[start]` of every interval."""
+    intervals = _as_intervals(intervals)
+    times = np.asarray(times)
+    return times[intervals[:, 1]] - times[intervals[:, 0]]
+
+
+def merge(intervals, max_gap=0):
+    """
+    Merges overlapping intervals and those that start at most `max_gap`
+    samples after the end of the previous one (`start <= end + max_gap`).
+    The input does not have to be sorted.
+    """
+    intervals = _as_intervals(intervals)
+    if not len(intervals):
+        return intervals
+    intervals = intervals[np.argsort(intervals[:, 0], kind='stable')]
+    reach = np.maximum.accumulate(intervals[:, 1])
+    first = np.concatenate([[True], intervals[1:, 0] > reach[:-1] + max_gap])
+    group_starts = np.flatnonzero(first)
+    return np.column_stack([intervals[group_starts, 0], np.maximum.reduceat(intervals[:, 1], group_starts)])
+
+
+def union(*interval_sets):
+    """Samples inside any of the sets; adjacent intervals are joined."""
+    return merge(np.concatenate([_as_intervals(intervals) for intervals in interval_sets]), max_gap=1)
+
+
+def intersection(*interval_sets):
+    """Samples inside all of the sets."""
+    interval_sets = [_as_intervals(intervals) for intervals in interval_sets]
+    n_samples = max((intervals[:, 1].max() + 1 for intervals in interval_sets if len(intervals)), default=0)
+    mask = np.ones(n_samples, dtype=bool)
+    for intervals in interval_sets:
+        mask &= intervals_to_mask(intervals, n_samples)
+    return mask_to_intervals(mask)
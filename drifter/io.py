@@ -0,0 +1,64 @@
+"""
+Fast reader for the 17-column drifter M-files.
+
+The scripts used to read the logs with `engine='python'`, replace the '�'
+bytes and then convert every column with its own `pd.to_numeric` call. This
+module does the same job with the compiled C parser: the rows that pandas
+already parses as numbers stay untouched, and only columns that picked up
+garbage are coerced, in one pass over the frame.
+"""
+
+import pandas as pd
+
+# bump whenever read_drifter_log returns different values for the same file,
+# cached copies made by an older parser are then ignored
+PARSER_VERSION = 1
+
+COLUMN_NAMES = [
+    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
+    'accx', 'accy', 'accz',
+    'gyx', 'gyy', 'gyz',
+    'magx', 'magy', 'magz',
+    'hgax', 'hgay', 'hgaz'
+]
+
+
+def _to_numeric_frame(data_file):
+    """Coerces every non-numeric column to float, invalid entries become NaN."""
+    bad_columns = [col for col in data_file.columns
+                   if not pd.api.types.is_numeric_dtype(data_file[col])]
+    if bad_columns:
+        data_file[bad_columns] = data_file[bad_columns].apply(pd.to_numeric, errors='coerce')
+    value_columns = [col for col in data_file.columns if col != 'time']
+    data_file[value_columns] = data_file[value_columns].astype('float64')
+    return data_file
+
+
+def read_drifter_log(file_path, delimiter=',', skiprows=None, column_names=COLUMN_NAMES,
+                     encoding='ISO-8859-1', chunksize=None, engine='c'):
+    """
+    Reads a raw or screened drifter log into a DataFrame of numeric columns.
+
+    Raw M-files are comma separated without a header; the screened
+    `filtered_pressure*.txt` files are tab separated with a header row, so
+    they are read with `delimiter='\\t', skiprows=1`. Lines pandas cannot
+    tokenize are skipped, exactly like the old `on_bad_lines='skip'` loaders.
+    All channels are returned as float64, `time` stays in milliseconds.
+
+    If `chunksize` is given an iterator of cleaned chunks is returned instead.
+    `engine='pyarrow'` can be used when pyarrow is installed.
+    """
+    options = dict(
+        names=column_names,
+        delimiter=delimiter,
+        header=None,
+        na_values=['', ' '],
+        usecols=range(len(column_names)),
+        on_bad_lines='skip',
+        skiprows=skiprows,
+        encoding=encoding,
+        engine=engine,
+    )
+    if chunksize is not None:
+        return (_to_numeric_frame(chunk) for chunk in pd.read_csv(file_path, chunksize=chunksize, **options))
+    return _to_numeric_frame(pd.read_csv(file_path, **options))
@@ -0,0 +1,149 @@
+"""
+Scalar random-walk Kalman filter used to smooth the acceleration channels.
+
+The model is `x[n] = x[n-1] + w`, `z[n] = x[n] + v` with constant process and
+measurement variances. The covariance recursion and therefore the gain
+sequence `K[n]` do not depend on the data, so they are computed first. The
+gain converges geometrically to its steady-state value; only the few hundred
+samples before that are run sample by sample. From there on the update
+
+    x[n] = (1 - K) * x[n-1] + K * z[n]
+
+is a fixed first-order IIR filter and is applied with `scipy.signal.lfilter`.
+The result equals the original per-sample loop to rounding. Several channels
+(with their own variances) and several deployments are filtered together, so
+the per-sample Python work of the transient is shared by all of them.
+"""
+
+import numpy as np
+from scipy.signal import lfilter
+
+# relative change of the gain below which it is treated as converged
+GAIN_TOLERANCE = 1e-15
+
+
+def kalman_gains(n_samples, process_variance, measurement_variance, initial_covariance=1,
+                 tolerance=GAIN_TOLERANCE):
+    """
+    Gain sequence of the filter until it has converged.
+
+    The variances may be scalars or arrays (one value per channel). Returns
+    `(gains, P)`: the gains of the first samples (at most `n_samples`, one row
+    per sample), whose last row is the steady-state gain of every channel
+    when fewer than `n_samples` rows are returned, and the covariance after
+    the last of them.
+    """
+    process_variance, measurement_variance, P = np.broadcast_arrays(
+        np.asarray(process_variance, dtype='float64'), np.asarray(measurement_variance, dtype='float64'),
+        np.asarray(initial_covariance, dtype='float64'))
+    P = P.copy()
+    gains = []
+    K_previous = np.full(P.shape, np.nan)
+    for _ in range(n_samples):
+        P_pred = P + process_variance
+        K = P_pred / (P_pred + measurement_variance)
+        P = (1 - K) * P_pred
+        gains.append(K)
+        if np.all(np.abs(K - K_previous) <= tolerance * K):
+            break
+        K_previous = K
+    return np.array(gains).reshape((len(gains),) + P.shape), P
+
+
+def _filter_block(z, process_variance, measurement_variance, initial_state, initial_covariance):
+    """Filters an (N, M) block; returns the estimates and the final (x, P) per channel."""
+    gains, P = kalman_gains(len(z), process_variance, measurement_variance, initial_covariance)
+    filtered_data = np.empty(z.shape)
+    x = initial_state
+    # transient part with a changing gain, all channels at once
+    for i, K in enumerate(gains):
+        x = x + K * (z[i] - x)
+        filtered_data[i] = x
+    n_transient = len(gains)
+    if n_transient < len(z):
+        for c, K in enumerate(gains[-1]):
+            filtered_data[n_transient:, c], _ = lfilter([K], [1, K - 1], z[n_transient:, c], zi=[(1 - K) * x[c]])
+        x = filtered_data[-1]
+    return filtered_data, x, P
+
+
+def _as_block(accel_data, axis):
+    z = np.moveaxis(np.asarray(accel_data, dtype='float64'), axis, 0)
+    return z.reshape(len(z), int(np.prod(z.shape[1:]))), z.shape[1:]
+
+
+def _per_channel(value, channel_shape):
+    return np.broadcast_to(np.asarray(value, dtype='float64'), channel_shape).reshape(-1)
+
+
+def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1,
+                  axis=0):
+    """
+    Filters `accel_data` and returns the state estimate after every sample.
+
+    `accel_data` is a 1-D signal or an array with time along `axis`, e.g. an
+    (N, C) block of channels or an (N, D, C) stack of deployments padded at
+    the end with NaN (see `kalman_filter_ragged`). The variances, initial
+    state and covariance broadcast against the other axes, so every channel
+    can have its own. All channels are filtered in one pass.
+    """
+    z, channel_shape = _as_block(accel_data, axis)
+    filtered_data, _, _ = _filter_block(z, *(_per_channel(value, channel_shape) for value in (
+        process_variance, measurement_variance, initial_state, initial_covariance)))
+    return np.moveaxis(filtered_data.reshape(z.shape[:1] + channel_shape), 0, axis)
+
+
+class StreamingKalmanFilter:
+    """
+    `kalman_filter` for input that arrives in pieces (chunked reads, live data).
+
+    The state `(x, P)` is kept between calls to `update`, so filtering a log
+    chunk by chunk gives the same result as one `kalman_filter` call over the
+    whole array (to rounding) instead of a new transient at every chunk
+    boundary. The state can be read and restored to resume later.
+    """
+
+    def __init__(self, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self.x = np.asarray(initial_state, dtype='float64')
+        self.P = np.asarray(initial_covariance, dtype='float64')
+
+    @property
+    def state(self):
+        """Current `(x, P)`, one value per channel."""
+        return self.x, self.P
+
+    @state.setter
+    def state(self, state):
+        self.x, self.P = (np.asarray(value, dtype='float64') for value in state)
+
+    def update(self, accel_data, axis=0):
+        """Filters the next piece of the signal (same layout as `kalman_filter`) and advances the state."""
+        z, channel_shape = _as_block(accel_data, axis)
+        if not len(z):
+            return np.moveaxis(z.reshape(z.shape[:1] + channel_shape), 0, axis)
+        filtered_data, x, P = _filter_block(z, *(_per_channel(value, channel_shape) for value in (
+            self.process_variance, self.measurement_variance, self.x, self.P)))
+        self.x, self.P = x.reshape(channel_shape), P.reshape(channel_shape)
+        return np.moveaxis(filtered_data.reshape(z.shape[:1] + channel_shape), 0, axis)
+
+
+def kalman_filter_ragged(signals, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
+    """
+    Filters several deployments of different lengths in one pass.
+
+    `signals` is a list of 1-D or (N_i, C) arrays. They are padded at the end
+    with NaN to a common length, filtered together and returned as a list of
+    arrays of the original lengths. The padding comes after the real samples,
+    so it does not change them.
+    """
+    signals = [np.asarray(signal, dtype='float64') for signal in signals]
+    if not signals:
+        return []
+    n_max = max(len(signal) for signal in signals)
+    padded = np.full((n_max, len(signals)) + signals[0].shape[1:], np.nan)
+    for d, signal in enumerate(signals):
+        padded[:len(signal), d] = signal
+    filtered = kalman_filter(padded, process_variance, measurement_variance, initial_state, initial_covariance)
+    return [filtered[:len(signal), d] for d, signal in enumerate(signals)]
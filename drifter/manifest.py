@@ -0,0 +1,44 @@
+"""
+Manifest of already processed input files.
+
+A manifest is a JSON file mapping each input path to the content hash it had
+when it was processed, the parameters that were used and the outputs that were
+written. Batch scripts use it to skip files that have not changed since the
+last run, so a nightly rerun only costs as much as the new data.
+"""
+
+import json
+import os
+import uuid
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest_path, manifest):
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    tmp_path = f'{manifest_path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, default=str)
+    os.replace(tmp_path, manifest_path)
+
+
+def is_up_to_date(entry, digest, parameters):
+    """True if a manifest entry matches the file hash, parameters and its outputs still exist."""
+    if not entry or entry.get('digest') != digest or entry.get('parameters') != parameters:
+        return False
+    return all(os.path.exists(path) for path in entry.get('outputs', []))
+
+
+def record(manifest, input_path, digest, parameters, outputs, summary=None):
+    manifest[os.path.abspath(input_path)] = {
+        'digest': digest,
+        'parameters': parameters,
+        'outputs': outputs,
+        'summary': summary or {},
+    }
@@ -0,0 +1,170 @@
+"""
+Constant-acceleration Kalman filter and RTS smoother for the rotated
+acceleration channels.
+
+Every axis has the state (position, velocity, acceleration), driven by white
+jerk noise with spectral density `jerk_variance` (the exact discretisation
+of that model is used for the process noise) and observed through the
+measured acceleration with variance `measurement_variance`. Every axis is
+estimated independently with its own variances.
+
+The model has a structure that makes both passes linear in time without a
+per-sample Python loop:
+
+- Only the acceleration is observed, so the acceleration estimate is the
+  scalar random-walk filter of `drifter.kalman` (process variance
+  `jerk_variance * dt`). Velocity and position follow from the same
+  innovations, `v[n] = v[n-1] + dt * a[n-1] + K_v[n] * (z[n] - a[n-1])` and
+  similarly for position, i.e. cumulative sums. The gains are data
+  independent; they come from the 3x3 covariance recursion, run only until
+  the gains have converged.
+- The smoothed acceleration is the scalar RTS smoother, a backward first-
+  order filter (again `lfilter` once its gain has converged). Between two
+  samples the acceleration is a Brownian bridge given its end points, so the
+  smoothed velocity and position are exact trapezoid-like cumulative sums of
+  the smoothed acceleration, starting from the prior of the initial state
+  (which the measurements carry no information about).
+
+Position and velocity are not observable from acceleration alone, so their
+estimates are integrals that drift with any bias left in the rotated
+accelerations; they are meant for short motion events, not for navigation.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+from drifter.kalman import GAIN_TOLERANCE, kalman_filter, kalman_gains
+
+MotionEstimate = namedtuple('MotionEstimate', ['position', 'velocity', 'acceleration'])
+
+
+def transition_matrices(dt, jerk_variance):
+    """State transition `F` and process noise `Q` (one per channel) of the constant-acceleration model."""
+    F = np.array([[1, dt, dt * dt / 2],
+                  [0, 1, dt],
+                  [0, 0, 1]])
+    Q = np.array([[dt ** 5 / 20, dt ** 4 / 8, dt ** 3 / 6],
+                  [dt ** 4 / 8, dt ** 3 / 3, dt ** 2 / 2],
+                  [dt ** 3 / 6, dt ** 2 / 2, dt]])
+    return F, np.asarray(jerk_variance, dtype='float64')[:, None, None] * Q
+
+
+def motion_gains(n_samples, dt, jerk_variance, measurement_variance, initial_covariance, tolerance=GAIN_TOLERANCE):
+    """
+    Kalman gains (position, velocity, acceleration) of the first samples,
+    until all of them have converged; shape (n, C, 3). Same convention as
+    `drifter.kalman.kalman_gains`.
+    """
+    F, Q = transition_matrices(dt, jerk_variance)
+    P = np.array(initial_covariance, dtype='float64')
+    gains = []
+    K_previous = np.full(P.shape[:2], np.nan)
+    for _ in range(n_samples):
+        # all channels at once, (C, 3, 3)
+        P_pred = F @ P @ F.T + Q
+        S = P_pred[:, 2, 2] + measurement_variance
+        K = P_pred[:, :, 2] / S[:, None]
+        P = P_pred - K[:, :, None] * P_pred[:, 2, None, :]
+        gains.append(K)
+        if np.all(np.abs(K - K_previous) <= tolerance * np.abs(K)):
+            break
+        K_previous = K
+    return np.array(gains).reshape((len(gains),) + K_previous.shape)
+
+
+def _prepare(accel_data, jerk_variance, measurement_variance, initial_state, initial_covariance):
+    z = np.asarray(accel_data, dtype='float64')
+    is_1d = z.ndim == 1
+    z = z.reshape(len(z), 1) if is_1d else z
+    n_channels = z.shape[1]
+    jerk_variance, measurement_variance = (np.broadcast_to(np.asarray(value, dtype='float64'), (n_channels,))
+                                           for value in (jerk_variance, measurement_variance))
+    # (position, velocity, acceleration) per channel, prior covariance is diagonal
+    x0 = np.broadcast_to(np.asarray(initial_state, dtype='float64'), (n_channels, 3))
+    P0 = np.broadcast_to(np.asarray(initial_covariance, dtype='float64'), (n_channels, 3))
+    return z, is_1d, jerk_variance, measurement_variance, x0, P0
+
+
+def _full_length(gains, n_samples):
+    """Per-sample gains, the last (converged) row repeated to `n_samples`."""
+    if len(gains) >= n_samples:
+        return gains[:n_samples]
+    return np.concatenate([gains, np.repeat(gains[-1:], n_samples - len(gains), axis=0)])
+
+
+def _shape_output(estimate, is_1d):
+    if is_1d:
+        return MotionEstimate(*(values[:, 0] for values in estimate))
+    return MotionEstimate(*estimate)
+
+
+def motion_filter(accel_data, dt, jerk_variance, measurement_variance, initial_state=(0, 0, 0),
+                  initial_covariance=(1, 1, 1)):
+    """
+    Causal (forward) estimate of position, velocity and acceleration.
+
+    `accel_data` is a 1-D signal or an (N, C) block, e.g. the
+    `X_forward, Y_lateral, Z_upward` columns, sampled every `dt` seconds.
+    The variances can be given per channel; `initial_state` and the diagonal
+    `initial_covariance` are (position, velocity, acceleration) values for
+    all channels or a (C, 3) array. Returns a `MotionEstimate` of arrays
+    shaped like `accel_data`.
+    """
+    z, is_1d, jerk_variance, measurement_variance, x0, P0 = _prepare(
+        accel_data, jerk_variance, measurement_variance, initial_state, initial_covariance)
+    n_samples = len(z)
+    acceleration = kalman_filter(z, jerk_variance * dt, measurement_variance, x0[:, 2], P0[:, 2])
+    if not n_samples:
+        return _shape_output((z.copy(), z.copy(), acceleration), is_1d)
+
+    P0_matrix = np.zeros((len(x0), 3, 3))
+    P0_matrix[:, [0, 1, 2], [0, 1, 2]] = P0
+    K = _full_length(motion_gains(n_samples, dt, jerk_variance, measurement_variance, P0_matrix), n_samples)
+    previous_acceleration = np.vstack([x0[None, :, 2], acceleration[:-1]])
+    innovation = z - previous_acceleration
+    velocity = x0[:, 1] + np.cumsum(dt * previous_acceleration + K[:, :, 1] * innovation, axis=0)
+    previous_velocity = np.vstack([x0[None, :, 1], velocity[:-1]])
+    position = x0[:, 0] + np.cumsum(dt * previous_velocity + dt * dt / 2 * previous_acceleration
+                                    + K[:, :, 0] * innovation, axis=0)
+    return _shape_output((position, velocity, acceleration), is_1d)
+
+
+def motion_smoother(accel_data, dt, jerk_variance, measurement_variance, initial_state=(0, 0, 0),
+                    initial_covariance=(1, 1, 1)):
+    """
+    Rauch-Tung-Striebel (offline) estimate of position, velocity and
+    acceleration, using the whole record; same arguments as `motion_filter`.
+    Unlike the causal filter it has no lag.
+    """
+    z, is_1d, jerk_variance, measurement_variance, x0, P0 = _prepare(
+        accel_data, jerk_variance, measurement_variance, initial_state, initial_covariance)
+    n_samples, n_channels = z.shape
+    process_variance = jerk_variance * dt
+    filtered = kalman_filter(z, process_variance, measurement_variance, x0[:, 2], P0[:, 2])
+
+    # scalar RTS on the acceleration, with the prior (sample -1) in front:
+    # a_s[n] = a_f[n] + c[n] * (a_s[n + 1] - a_f[n]),  c[n] = P_f[n] / (P_f[n] + q)
+    gains, _ = kalman_gains(n_samples, process_variance, measurement_variance, P0[:, 2])
+    filtered_covariance = np.vstack([P0[None, :, 2], measurement_variance * gains])  # P_f = r * K
+    smoother_gains = filtered_covariance / (filtered_covariance + process_variance)
+    a_f = np.vstack([x0[None, :, 2], filtered])
+    a_s = np.empty(a_f.shape)
+    a_s[-1] = a_f[-1]
+    # from row n_steady on the smoother gain has converged: a backward first-order filter
+    n_steady = len(smoother_gains) - 1 if len(gains) < n_samples else n_samples
+    if n_steady < n_samples:
+        c = smoother_gains[-1]
+        for channel in range(n_channels):
+            reversed_smoothed, _ = lfilter([1 - c[channel]], [1, -c[channel]], a_f[n_steady:-1, channel][::-1],
+                                           zi=[c[channel] * a_s[-1, channel]])
+            a_s[n_steady:-1, channel] = reversed_smoothed[::-1]
+    for n in range(n_steady - 1, -1, -1):
+        a_s[n] = a_f[n] + smoother_gains[n] * (a_s[n + 1] - a_f[n])
+
+    # integrate the Brownian-bridge mean of the acceleration between the samples
+    velocity = x0[:, 1] + np.cumsum(dt * (a_s[:-1] + a_s[1:]) / 2, axis=0)
+    previous_velocity = np.vstack([x0[None, :, 1], velocity[:-1]])
+    position = x0[:, 0] + np.cumsum(dt * previous_velocity + dt * dt * (a_s[:-1] / 3 + a_s[1:] / 6), axis=0)
+    return _shape_output((position, velocity, a_s[1:]), is_1d)
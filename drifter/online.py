@@ -0,0 +1,154 @@
+"""
+Online version of the variance screening for live drifter telemetry.
+
+The offline screening needs the whole file because its threshold is
+`mean + k * std` of the rolling variance over the complete log. Here the
+rolling variance is updated in O(1) per sample from a ring buffer and the
+threshold statistics are running (Welford) estimates over the variances
+seen so far, so ROI start/end events can be reported while a deployment is
+still running.
+
+A ROI starts at the first sample of a run of at least `confirm` samples
+whose rolling variance exceeds the current threshold (short excursions of a
+quiet log are not reported; runs of plain noise rarely outlast one window,
+hence the default of two) and is closed once the variance has stayed below the threshold
+for `end_hold` samples, so end events arrive at most `end_hold` samples
+late and start events at most `confirm` samples late. No events are emitted during the first `warmup` variance values while
+the threshold statistics settle.
+
+The variances of an open ROI are kept out of the statistics, otherwise the
+threshold climbs with the ROI and closes it early; those of a run that ends
+before it is confirmed are added once it ends.
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+ROIEvent = namedtuple('ROIEvent', ['kind', 'time', 'variance', 'threshold'])
+
+
+class OnlineROIDetector:
+    """Incremental high-variance ROI detector for one pressure channel."""
+
+    # the running sums are rebuilt from the buffer this often to stop rounding drift
+    RESYNC_EVERY = 100_000
+
+    def __init__(self, window_size=50, k=2, warmup=None, end_hold=None, confirm=None):
+        self.window_size = window_size
+        self.k = k
+        self.warmup = 10 * window_size if warmup is None else warmup
+        self.end_hold = window_size if end_hold is None else end_hold
+        self.confirm = 2 * window_size if confirm is None else confirm
+
+        self._buffer = np.zeros(window_size)
+        self._n_values = 0
+        self._n_nan = 0
+        self._shift = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+        # running mean/std of the rolling variance outside ROIs (Welford)
+        self._n_variance = 0
+        self._variance_mean = 0.0
+        self._variance_m2 = 0.0
+        self._pending = []  # variances of the run above the threshold not confirmed yet
+
+        self.in_roi = False
+        self._roi_last_time = None
+        self._below_count = 0
+        self._above_count = 0
+        self._above_start = None
+
+    @property
+    def threshold(self):
+        if self._n_variance < 2:
+            return math.nan
+        return self._variance_mean + self.k * math.sqrt(self._variance_m2 / (self._n_variance - 1))
+
+    def _push(self, value):
+        """Adds a sample to the ring buffer and returns the rolling variance (NaN while undefined)."""
+        slot = self._n_values % self.window_size
+        if self._n_values >= self.window_size:
+            old = self._buffer[slot]
+            if math.isnan(old):
+                self._n_nan -= 1
+            else:
+                self._sum -= old - self._shift
+                self._sum_sq -= (old - self._shift) ** 2
+        self._buffer[slot] = value
+        self._n_values += 1
+        if math.isnan(value):
+            self._n_nan += 1
+        else:
+            if self._shift is None:
+                self._shift = value
+            self._sum += value - self._shift
+            self._sum_sq += (value - self._shift) ** 2
+
+        if self._n_values % self.RESYNC_EVERY == 0 and self._n_nan == 0:
+            # recentre on the current window to keep the sums small and exact
+            self._shift = float(self._buffer.mean())
+            centered = self._buffer - self._shift
+            self._sum = float(centered.sum())
+            self._sum_sq = float((centered ** 2).sum())
+
+        if self._n_values < self.window_size or self._n_nan:
+            return math.nan
+        n = self.window_size
+        return max((self._sum_sq - self._sum * self._sum / n) / (n - 1), 0.0)
+
+    def _add_variance(self, variance):
+        self._n_variance += 1
+        delta = variance - self._variance_mean
+        self._variance_mean += delta / self._n_variance
+        self._variance_m2 += delta * (variance - self._variance_mean)
+
+    def update(self, time, value):
+        """Consumes one sample and returns the list of ROI events it triggered."""
+        variance = self._push(float(value))
+        if math.isnan(variance):
+            return []
+
+        if self._n_variance < self.warmup:
+            self._add_variance(variance)
+            return []
+
+        threshold = self.threshold
+        events = []
+        if variance > threshold:
+            if self._above_count == 0:
+                self._above_start = time
+            self._above_count += 1
+            if self.in_roi:
+                self._roi_last_time = time
+                self._below_count = 0
+            elif self._above_count >= self.confirm:
+                self.in_roi = True
+                self._roi_last_time = time
+                self._below_count = 0
+                self._pending = []
+                events.append(ROIEvent('start', self._above_start, variance, threshold))
+            else:
+                self._pending.append(variance)
+            return events
+        self._above_count = 0
+        for pending in self._pending:
+            self._add_variance(pending)
+        self._pending = []
+        if not self.in_roi:
+            self._add_variance(variance)
+        else:
+            self._below_count += 1
+            if self._below_count >= self.end_hold:
+                self.in_roi = False
+                events.append(ROIEvent('end', self._roi_last_time, variance, threshold))
+        return events
+
+    def close(self):
+        """Ends an open ROI when the stream stops."""
+        if not self.in_roi:
+            return []
+        self.in_roi = False
+        return [ROIEvent('end', self._roi_last_time, math.nan, self.threshold)]
@@ -0,0 +1,58 @@
+"""
+Orientation of the drifter from integrated gyro rates.
+
+Every sample rotates the current orientation by the small rotation
+`gyro * dt` (body frame, right-multiplied). Instead of composing these one
+`scipy.spatial.transform.Rotation` at a time, all delta quaternions are built
+in one batched call and composed with a parallel prefix product (log2(N)
+vectorised steps of quaternion multiplication), which gives the orientation
+after every sample as one batched `Rotation`. Quaternions use scipy's scalar-
+last (x, y, z, w) order.
+"""
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+IDENTITY_QUAT = np.array([0.0, 0.0, 0.0, 1.0])
+
+
+def quat_multiply(p, q):
+    """Hamilton product `p * q` of (..., 4) arrays of (x, y, z, w) quaternions."""
+    px, py, pz, pw = np.moveaxis(p, -1, 0)
+    qx, qy, qz, qw = np.moveaxis(q, -1, 0)
+    return np.stack([
+        pw * qx + px * qw + py * qz - pz * qy,
+        pw * qy - px * qz + py * qw + pz * qx,
+        pw * qz + px * qy - py * qx + pz * qw,
+        pw * qw - px * qx - py * qy - pz * qz,
+    ], axis=-1)
+
+
+def cumulative_quat_product(quats):
+    """
+    Running products `q[0] * q[1] * ... * q[i]` of an (N, 4) array.
+
+    Quaternion multiplication is associative, so the products are built as a
+    Hillis-Steele scan: after the step with offset s every entry holds the
+    product of the last 2s quaternions up to it.
+    """
+    products = np.array(quats, dtype='float64')
+    offset = 1
+    while offset < len(products):
+        products[offset:] = quat_multiply(products[:-offset], products[offset:])
+        offset *= 2
+    return products / np.linalg.norm(products, axis=1, keepdims=True)
+
+
+def integrate_gyro(gyro, dt, initial_quat=IDENTITY_QUAT):
+    """
+    Orientation after every sample of an (N, 3) block of angular rates.
+
+    `dt` is the sample interval (a scalar or one value per sample) and
+    `initial_quat` the (x, y, z, w) orientation before the first sample.
+    Returns a `Rotation` holding N orientations.
+    """
+    rotation_vectors = np.asarray(gyro, dtype='float64') * np.reshape(np.abs(dt), (-1, 1))
+    delta_quats = Rotation.from_rotvec(rotation_vectors).as_quat()
+    quats = cumulative_quat_product(np.vstack([Rotation.from_quat(initial_quat).as_quat(), delta_quats]))
+    return Rotation.from_quat(quats[1:])
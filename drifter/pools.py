@@ -0,0 +1,104 @@
+"""
+Dual-sensor pool (high-pressure region) detection of `Step_pool.py`.
+
+A region starts where the smoothed pressure rises above `mean + threshold`,
+extended back to the last sample at or below the mean within `2 * window`
+samples, and ends where it falls below the threshold again, extended
+forward to the next sample at or below the mean within `2 * window`
+samples. The regions of both sensors are merged when they overlap or lie
+at most `window` samples apart.
+
+Instead of a loop over the samples with inner look-back/look-forward
+loops, the crossings come from the mask edges and the baseline returns
+from precomputed previous/next-below-baseline index arrays. The result is
+identical to the loop, including its edge cases (a region still open at
+the end of the data); `benchmarks/bench_pools.py` checks this against the
+original loops.
+
+`detect_pools_std` is the variant of `Step_pool_Update.py`: a threshold of
+median + `std_multiplier` * std per sensor, and regions where either
+sensor is above its threshold.
+"""
+
+import numpy as np
+import pandas as pd
+
+from drifter.intervals import mask_to_intervals, merge, min_samples
+
+POOL_WINDOW = 2
+POOL_THRESHOLD = 15
+POOL_MIN_DURATION = 0.001
+POOL_STD_MULTIPLIER = 5
+
+
+def smooth_pressure(pressure_data, window_size=POOL_WINDOW):
+    """Centred rolling mean of the pressure, NaN at the edges."""
+    return pd.Series(pressure_data).rolling(window=window_size, center=True).mean().values
+
+
+def detect_pools(pressure_data, window_size=POOL_WINDOW, threshold=POOL_THRESHOLD, min_duration=POOL_MIN_DURATION):
+    """High-pressure regions `[start, end]` (positions) of one pressure sensor."""
+    pressure_data = np.asarray(pressure_data, dtype='float64')
+    baseline = np.mean(pressure_data)
+    smoothed = smooth_pressure(pressure_data, window_size)
+    n = len(smoothed)
+    runs = mask_to_intervals(smoothed > baseline + threshold)
+    if not len(runs):
+        return runs
+
+    # last sample at or below the baseline up to every sample (-1: none), and
+    # the first one from every sample on (n: none)
+    below = smoothed <= baseline
+    positions = np.arange(n)
+    previous_below = np.maximum.accumulate(np.where(below, positions, -1))
+    next_below = np.minimum.accumulate(np.where(below, positions, n)[::-1])[::-1]
+
+    # look back from the crossing, at most 2 * window samples
+    crossings = runs[:, 0]
+    starts = previous_below[crossings]
+    starts = np.where(starts > np.maximum(0, crossings - window_size * 2), starts, crossings)
+
+    # look forward from the first sample back below the threshold
+    returns = runs[:, 1] + 1
+    closed = returns < n
+    returns = np.minimum(returns, n - 1)
+    ends = next_below[returns]
+    ends = np.where(ends < np.minimum(n, returns + window_size * 2), ends, returns)
+    keep = ends - starts >= min_duration
+
+    # a region still open at the end of the data looks back from the last sample
+    if not closed[-1]:
+        end = previous_below[n - 1]
+        ends[-1] = end if end > max(0, n - window_size * 2) else n
+        keep[-1] = n - starts[-1] >= min_duration
+    return np.column_stack([starts, ends])[keep]
+
+
+def detect_pools_dual(pressure1, pressure2, window_size=POOL_WINDOW, threshold=POOL_THRESHOLD,
+                      min_duration=POOL_MIN_DURATION):
+    """Regions of both sensors, merged when they overlap or are at most `window_size` samples apart."""
+    return merge(np.concatenate([detect_pools(pressure, window_size, threshold, min_duration)
+                                 for pressure in (pressure1, pressure2)]), max_gap=window_size)
+
+
+def std_threshold(smoothed, std_multiplier=POOL_STD_MULTIPLIER):
+    """`(median, std, median + std_multiplier * std)` of a smoothed pressure signal."""
+    baseline = np.nanmedian(smoothed)
+    std = np.nanstd(smoothed)
+    return baseline, std, baseline + std_multiplier * std
+
+
+def detect_pools_std(pressure1, pressure2, window_size=POOL_WINDOW, std_multiplier=POOL_STD_MULTIPLIER,
+                     min_duration=POOL_MIN_DURATION):
+    """
+    Regions where either smoothed sensor is above its own median + std
+    threshold. A region ends at the first sample back below the threshold
+    (the last sample at the end of the data).
+    """
+    above = False
+    for pressure in (pressure1, pressure2):
+        smoothed = smooth_pressure(pressure, window_size)
+        above = above | (smoothed > std_threshold(smoothed, std_multiplier)[2])
+    regions = min_samples(mask_to_intervals(above), min_duration)
+    regions[:, 1] = np.minimum(regions[:, 1] + 1, len(above) - 1)
+    return regions
@@ -0,0 +1,55 @@
+"""
+Preprocessing stages shared by the analysis scripts.
+
+Every script starts the same way: load a log, express time relative to the
+first sample, drop rows without accelerations, rotate the accelerations
+into the global frame and smooth them with the Kalman filter. The stages
+below are those steps, one function each, so the scripts (and
+`benchmarks/bench_stages.py`) call the same code:
+
+    data_file = load_screened(file_path, channels)       # drifter.roi / drifter.store
+    add_time_columns(data_file)
+    prepare_acceleration(data_file, sensor=file_path)
+    filtered_accel = smooth_acceleration(data_file)      # (N, 3)
+"""
+
+
+from drifter.frames import ACCEL_COLUMNS, GLOBAL_COLUMNS, add_global_acceleration
+from drifter.kalman import kalman_filter
+
+PROCESS_VARIANCE = 1e-4
+MEASUREMENT_VARIANCE = 0.05
+
+
+def add_time_columns(data_file, t_1=None):
+    """Adds `time_seconds` and `time_minutes` relative to `t_1` (default: first time value)."""
+    if t_1 is None:
+        t_1 = data_file['time'].iloc[0]
+    data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
+    data_file['time_minutes'] = data_file['time_seconds'] / 60
+    return data_file
+
+
+def prepare_acceleration(data_file, sensor=None, R=None):
+    """
+    Drops rows with a missing acceleration (in place) and adds the global
+    `X_forward, Y_lateral, Z_upward` columns, see `add_global_acceleration`.
+    """
+    data_file.dropna(subset=ACCEL_COLUMNS, inplace=True)
+    return add_global_acceleration(data_file, R, sensor)
+
+
+def smooth_acceleration(data_file, process_variance=PROCESS_VARIANCE, measurement_variance=MEASUREMENT_VARIANCE,
+                        columns=GLOBAL_COLUMNS):
+    """Kalman-filtered `columns` as an (N, len(columns)) array, all channels in one pass."""
+    return kalman_filter(data_file[columns].to_numpy(dtype='float64'), process_variance, measurement_variance)
+
+
+def remove_outliers(data_file, column, lower_quantile=0.10, upper_quantile=0.90):
+    """Keeps the rows whose `column` lies within 1.5 IQR (between the given quantiles) of the bounds."""
+    Q1, Q3 = data_file[column].quantile([lower_quantile, upper_quantile])
+    IQR = Q3 - Q1
+    lower_bound = Q1 - 1.5 * IQR
+    upper_bound = Q3 + 1.5 * IQR
+    values = data_file[column].to_numpy()
+    return data_file[(values >= lower_bound) & (values <= upper_bound)]
@@ -0,0 +1,150 @@
+"""
+Compact ROI descriptors for screened logs.
+
+Instead of two full-width TSV copies of the ROI rows, screening writes one
+small `roi.json` per log:
+
+    {
+      "version": 1,
+      "source": "H:/Rida/Dataset/13072021/M21/M210713161036.txt",
+      "digest": "<sha1 of the source file>",
+      "parser_version": 1,
+      "parameters": {"window_size": 50, "k": 2},
+      "rois": {
+        "pressure1": {"start_row": 1200, "end_row": 58877, "start_time": ..., "end_time": ...},
+        "pressure2": {...}
+      }
+    }
+
+Rows are positions in the parsed raw log (inclusive), so a reader resolves
+a ROI lazily by memory-mapping the cached raw channels and slicing them.
+When `time` is not monotonic (skipped bad lines, a logger glitch) the rows
+inside the ROI time range are not one block; the ROI then also lists its
+`row_ranges` (inclusive `[start, end]` pairs), so it holds exactly the rows
+of the time mask and never the out-of-range rows between them.
+The old TSV files can still be made when a tool needs them:
+
+    python -m drifter.roi export H:/Rida/new_data/13072021/M21/M210713161036.txt/roi.json
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+from drifter.cache import file_digest
+from drifter.intervals import mask_to_intervals
+from drifter.io import PARSER_VERSION
+from drifter.store import load_channels
+
+ROI_FILE = 'roi.json'
+DESCRIPTOR_VERSION = 1
+
+
+def roi_rows(data_file, time_range, time_column='time'):
+    """
+    Rows (positions) of `data_file` inside the ROI `time_range`, as a list of
+    inclusive `[start, end]` ranges: one range when `time` is monotonic.
+    """
+    start_time, end_time = time_range
+    time = data_file[time_column].to_numpy()
+    return mask_to_intervals((time >= start_time) & (time <= end_time)).tolist()
+
+
+def roi_entry(row_ranges, time_range):
+    """The `rois` entry of a descriptor for the rows returned by `roi_rows`."""
+    roi = {'start_row': row_ranges[0][0], 'end_row': row_ranges[-1][1],
+           'start_time': float(time_range[0]), 'end_time': float(time_range[1])}
+    if len(row_ranges) > 1:
+        roi['row_ranges'] = row_ranges
+    return roi
+
+
+def select_roi(data_file, roi):
+    """The rows of one ROI of `data_file` (the parsed raw log)."""
+    if 'row_ranges' in roi:
+        return data_file.iloc[np.concatenate([np.arange(start, end + 1) for start, end in roi['row_ranges']])]
+    return data_file.iloc[roi['start_row']:roi['end_row'] + 1]
+
+
+def write_roi_descriptor(output_directory, source, rois, parameters, digest=None):
+    """
+    Writes `roi.json` for a screened log. `rois` maps each pressure sensor to
+    a dict with `start_row`, `end_row`, `start_time` and `end_time` (and
+    `row_ranges` when the rows are not one block, see `roi_entry`), or None.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    descriptor = {
+        'version': DESCRIPTOR_VERSION,
+        'source': os.path.abspath(source),
+        'digest': digest or file_digest(source),
+        'parser_version': PARSER_VERSION,
+        'parameters': parameters,
+        'rois': rois,
+    }
+    descriptor_path = os.path.join(output_directory, ROI_FILE)
+    with open(descriptor_path, 'w') as f:
+        json.dump(descriptor, f, indent=2)
+    return descriptor_path
+
+
+def read_roi_descriptor(descriptor_path):
+    if os.path.isdir(descriptor_path):
+        descriptor_path = os.path.join(descriptor_path, ROI_FILE)
+    with open(descriptor_path) as f:
+        return json.load(f)
+
+
+def load_roi(descriptor_path, sensor='pressure1', channels=None, check_source=True):
+    """
+    Returns the raw rows of one ROI as a DataFrame (all 17 channels or only
+    `channels`). The source log is parsed once into the cache and then only
+    memory-mapped; a ValueError is raised if it changed since screening.
+    """
+    descriptor = read_roi_descriptor(descriptor_path)
+    roi = descriptor['rois'].get(sensor)
+    if roi is None:
+        raise ValueError(f"{descriptor_path} has no region of interest for {sensor}")
+    if descriptor['parser_version'] != PARSER_VERSION:
+        raise ValueError(f"{descriptor_path} was made with parser version {descriptor['parser_version']}, "
+                         f"rescreen it with the current version {PARSER_VERSION}")
+    source = descriptor['source']
+    if check_source and file_digest(source) != descriptor['digest']:
+        raise ValueError(f"{source} changed since it was screened, rescreen it before using {descriptor_path}")
+    data_file = load_channels(source, channels)
+    return select_roi(data_file, roi).reset_index(drop=True)
+
+
+def is_roi_descriptor(path):
+    return os.path.basename(path) == ROI_FILE or os.path.isfile(os.path.join(path, ROI_FILE))
+
+
+def load_screened(path, channels=None, sensor='pressure1'):
+    """
+    Loads screened data from either a `roi.json` descriptor (or the folder
+    holding one) or an exported `filtered_pressure*.txt` file.
+    """
+    if is_roi_descriptor(path):
+        return load_roi(path, sensor, channels)
+    return load_channels(path, channels, delimiter='\t', skiprows=1)
+
+
+def main(argv):
+    from drifter.screening import export_roi_tsv
+
+    if len(argv) < 2 or argv[0] != 'export':
+        print('usage: python -m drifter.roi export ROI_JSON... (writes filtered_pressure{1,2}.txt next to each)')
+        return 1
+    for descriptor_path in argv[1:]:
+        for sensor, output_filename in [('pressure1', 'filtered_pressure1.txt'), ('pressure2', 'filtered_pressure2.txt')]:
+            if read_roi_descriptor(descriptor_path)['rois'].get(sensor) is None:
+                continue
+            output_file = os.path.join(os.path.dirname(os.path.abspath(descriptor_path)), output_filename)
+            export_roi_tsv(descriptor_path, sensor, output_file)
+            print(f"Filtered data saved to {output_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
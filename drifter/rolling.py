@@ -0,0 +1,184 @@
+"""
+Rolling mean/variance/std for several channels and window sizes in one pass.
+
+The statistics come from prefix sums, so every window size costs two
+subtractions per sample once the sums are built, no matter how long the
+window is. The sums are accumulated in blocks and relative to each block's
+mean, which keeps the rounding error at the level of pandas' own rolling
+variance even for week-long logs. Results follow pandas' `rolling(window)`
+defaults: the first `window - 1` values and every window that contains a NaN
+are NaN. A window of identical values (a frozen sensor) has a variance of
+exactly 0, where pandas sometimes leaves a rounding residue.
+
+`rolling_stats_time` does the same over time windows (e.g. `'1s'` of the
+millisecond `time` column) for logs with dropped rows or different sample
+rates, without resampling them first.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+RollingStats = namedtuple('RollingStats', ['mean', 'var', 'std'])
+
+BLOCK_SIZE = 1 << 14
+
+
+def _constant_run_length(x):
+    """Length of the run of identical values that ends at every sample (per column)."""
+    n = len(x)
+    new_run = np.ones(x.shape, dtype=bool)
+    new_run[1:] = x[1:] != x[:-1]
+    run_start = np.where(new_run, np.arange(n)[:, None], 0)
+    np.maximum.accumulate(run_start, axis=0, out=run_start)
+    return np.arange(n)[:, None] - run_start + 1
+
+
+def rolling_stats(values, windows, ddof=1, block_size=BLOCK_SIZE):
+    """
+    Computes rolling mean, variance and std.
+
+    `values` is a 1-D array or an (N, C) array with one channel per column,
+    `windows` a window size or a list of them. Returns a `RollingStats`
+    for a single window, otherwise a dict {window: RollingStats}. Every
+    array has the shape of `values`.
+    """
+    single_window = np.isscalar(windows)
+    windows = [int(windows)] if single_window else [int(w) for w in windows]
+    x = np.asarray(values, dtype='float64')
+    one_dimensional = x.ndim == 1
+    if one_dimensional:
+        x = x[:, None]
+    n, n_channels = x.shape
+    max_window = max(windows)
+    block = max(block_size, 4 * max_window)
+    n_blocks = max(1, -(-n // block))
+
+    # overlapping blocks of length block + max_window - 1 (one row of blocks per
+    # channel), so that every output sample finds its whole window in its block
+    padded = np.full((n_channels, (max_window - 1) + n_blocks * block), np.nan)
+    padded[:, max_window - 1:max_window - 1 + n] = x.T
+    if n:
+        padded[:, :max_window - 1] = x[0][:, None]  # only fills the first windows, set to NaN below
+    blocks = sliding_window_view(padded, block + max_window - 1, axis=1)[:, ::block]  # (C, blocks, length)
+    missing = np.isnan(blocks)
+    any_missing = missing.any()
+    if any_missing:
+        valid = (~missing).sum(axis=-1, keepdims=True)
+        shift = np.where(missing, 0.0, blocks).sum(axis=-1, keepdims=True) / np.maximum(valid, 1)
+        centered = np.where(missing, 0.0, blocks - shift)
+    else:
+        shift = blocks.mean(axis=-1, keepdims=True)
+        centered = blocks - shift
+
+    def prefix_sum(a):
+        out = np.zeros(a.shape[:-1] + (a.shape[-1] + 1,), dtype=a.dtype)
+        np.cumsum(a, axis=-1, out=out[..., 1:])
+        return out
+
+    sum1 = prefix_sum(centered)
+    sum2 = prefix_sum(centered * centered)
+    n_missing = prefix_sum(missing.astype(np.int32)) if any_missing else None
+    run_length = _constant_run_length(x)
+
+    def unblock(a):
+        return a.reshape(n_channels, n_blocks * block)[:, :n].T
+
+    results = {}
+    for window in windows:
+        end = slice(max_window, max_window + block)
+        start = slice(max_window - window, max_window - window + block)
+        s1 = sum1[..., end] - sum1[..., start]
+        s2 = sum2[..., end] - sum2[..., start]
+
+        mean = unblock(s1 / window + shift)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = unblock((s2 - s1 * s1 / window) / (window - ddof))
+        np.maximum(var, 0.0, out=var)
+        if window > ddof:
+            var[run_length >= window] = 0.0  # windows of identical values
+        else:
+            var[:] = np.nan
+        if any_missing:
+            has_nan = unblock((n_missing[..., end] - n_missing[..., start]) > 0)
+            mean[has_nan] = np.nan
+            var[has_nan] = np.nan
+        mean[:window - 1] = np.nan
+        var[:window - 1] = np.nan
+        std = np.sqrt(var)
+        if one_dimensional:
+            mean, var, std = mean[:, 0], var[:, 0], std[:, 0]
+        results[window] = RollingStats(mean, var, std)
+    return results[windows[0]] if single_window else results
+
+
+def rolling_var(values, window, ddof=1):
+    """Rolling variance of one or several channels, same as `pd.Series.rolling(window).var()`."""
+    return rolling_stats(values, window, ddof=ddof).var
+
+
+def window_length(window, time_unit='ms'):
+    """Length of a time window (`'1s'`, `'500ms'`, a `pd.Timedelta` or a number of `time_unit`) in `time_unit`."""
+    if isinstance(window, (int, float, np.integer, np.floating)):
+        return float(window)
+    return pd.Timedelta(window) / pd.Timedelta(1, unit=time_unit)
+
+
+def rolling_stats_time(values, times, window, ddof=1, min_periods=1, time_unit='ms'):
+    """
+    Rolling mean, variance and std over the time window `(t - window, t]`
+    ending at every sample, like pandas' `rolling('1s')` on a time index.
+
+    `times` are the non-decreasing sample times in `time_unit` (the `time`
+    column is in milliseconds, `time_seconds` in seconds) and `window` is
+    given as in `window_length`. NaN values are skipped; a window with fewer
+    than `min_periods` values (or `ddof + 1` for the variance) gives NaN.
+    Returns a `RollingStats` with arrays shaped like `values`.
+    """
+    x = np.asarray(values, dtype='float64')
+    one_dimensional = x.ndim == 1
+    if one_dimensional:
+        x = x[:, None]
+    times = np.asarray(times, dtype='float64')
+    if len(times) != len(x):
+        raise ValueError(f"{len(times)} times for {len(x)} samples")
+    if np.any(np.diff(times) < 0):
+        raise ValueError("times must be non-decreasing")
+
+    # first sample of every window: the two-pointer sweep over the sorted
+    # times, done in one vectorised searchsorted
+    start = np.searchsorted(times, times - window_length(window, time_unit), side='right')
+    end = np.arange(1, len(x) + 1)
+
+    valid = ~np.isnan(x)
+    n_valid = valid.sum(axis=0)
+    shift = np.where(valid, x, 0.0).sum(axis=0) / np.maximum(n_valid, 1)
+    centered = np.where(valid, x - shift, 0.0)
+
+    def window_sum(a):
+        prefix = np.zeros((len(a) + 1,) + a.shape[1:], dtype=a.dtype)
+        np.cumsum(a, axis=0, out=prefix[1:])
+        return prefix[end] - prefix[start]
+
+    count = window_sum(valid.astype(np.int64))
+    s1 = window_sum(centered)
+    s2 = window_sum(centered * centered)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s1 / count + shift
+        var = (s2 - s1 * s1 / count) / (count - ddof)
+    np.maximum(var, 0.0, out=var)
+    var[_constant_run_length(x) >= (end - start)[:, None]] = 0.0  # windows of identical values
+    var[count <= ddof] = np.nan
+    mean[count < min_periods] = np.nan
+    var[count < min_periods] = np.nan
+    std = np.sqrt(var)
+    if one_dimensional:
+        mean, var, std = mean[:, 0], var[:, 0], std[:, 0]
+    return RollingStats(mean, var, std)
+
+
+def rolling_var_time(values, times, window, ddof=1, time_unit='ms'):
+    """Rolling variance over time windows, same as `pd.Series(values, index=times).rolling('1s').var()`."""
+    return rolling_stats_time(values, times, window, ddof=ddof, time_unit=time_unit).var
@@ -0,0 +1,323 @@
+"""
+Variance-based screening of raw drifter logs.
+
+A log is screened by computing the rolling variance of `pressure1` and
+`pressure2`, thresholding it at `mean + k * std` and keeping every row between
+the first and the last time the variance is above the threshold. The ROIs
+are saved as a `roi.json` descriptor (see `drifter.roi`); the full-width
+`filtered_pressure1.txt` and `filtered_pressure2.txt` copies are only written
+on request.
+
+`screen_log` does this on a frame in memory. `screen_log_streaming` gives the
+same result for logs that do not fit in memory: it reads the file in chunks,
+carries the last `window_size - 1` samples over each chunk boundary and needs
+three passes over the file (threshold statistics, ROI bounds, ROI rows).
+
+`sweep_file` evaluates many values of `k` on one rolling variance, to pick
+the threshold without rerunning the screening per value.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from drifter.intervals import union
+from drifter.io import read_drifter_log
+from drifter.preprocessing import add_time_columns
+from drifter.roi import read_roi_descriptor, roi_entry, roi_rows, select_roi, write_roi_descriptor
+from drifter.rolling import rolling_var
+from drifter.store import load_channels
+
+PRESSURE_COLUMNS = ['pressure1', 'pressure2']
+
+
+def rolling_variance_column(pressure):
+    """Name of the rolling variance column that belongs to a pressure column."""
+    return 'rolling_variance' + pressure[-1]
+
+
+def screen_log(data_file, window_size=50, k=1):
+    """
+    Adds the time and rolling variance columns to `data_file` and returns the
+    ROI time range `(start_time, end_time)` for each pressure sensor, or None
+    when the variance never exceeds the threshold.
+    """
+    add_time_columns(data_file)
+    # both sensors in one pass over the (N, 2) pressure block
+    variances = rolling_var(data_file[PRESSURE_COLUMNS].to_numpy(dtype='float64'), window_size)
+    bounds = {}
+    for i, pressure in enumerate(PRESSURE_COLUMNS):
+        variance_col = rolling_variance_column(pressure)
+        data_file[variance_col] = variances[:, i]
+        threshold = data_file[variance_col].mean() + k * data_file[variance_col].std()
+        roi_times = data_file.loc[data_file[variance_col] > threshold, 'time']
+        bounds[pressure] = (roi_times.min(), roi_times.max()) if len(roi_times) else None
+    return bounds
+
+
+def filter_roi(data_file, time_range, time_column='time'):
+    """Returns the rows of `data_file` inside the ROI `time_range`."""
+    start_time, end_time = time_range
+    return data_file[(data_file[time_column] >= start_time) & (data_file[time_column] <= end_time)]
+
+
+def save_filtered_data(data_file, time_range, output_directory, output_filename, time_column='time'):
+    """Saves the rows of `data_file` inside `time_range` as tab-separated values."""
+    os.makedirs(output_directory, exist_ok=True)
+    output_file = os.path.join(output_directory, output_filename)
+    filtered_data = filter_roi(data_file, time_range, time_column)
+    filtered_data.to_csv(output_file, index=False, sep='\t')  # Save as tab-separated values
+    print(f"Filtered data saved to {output_file}")
+    return filtered_data
+
+
+class BackgroundWriter:
+    """
+    Saves filtered frames as tab-separated files on a background thread, so
+    plotting and validation can go on with the frame already in memory.
+    Call `wait()` (or use it as a context manager) before the program exits.
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = []
+
+    def save(self, filtered_data, output_file):
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        future = self._executor.submit(filtered_data.to_csv, output_file, index=False, sep='\t')
+        self._pending.append((future, output_file))
+
+    def wait(self):
+        """Blocks until every file is written, re-raising the first write error."""
+        try:
+            for future, output_file in self._pending:
+                future.result()
+                print(f"Filtered data saved to {output_file}")
+        finally:
+            self._pending = []
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wait()
+
+
+def _chunk_rolling_variance(values, tail, window_size):
+    """Rolling variance of `values` continued from the `tail` of the previous chunk."""
+    values = np.concatenate([tail, values])
+    variance = rolling_var(values, window_size)[len(tail):]
+    return variance, values[-(window_size - 1):] if window_size > 1 else tail
+
+
+def _iter_screened_chunks(file_path, window_size, chunk_size, read_options):
+    """Yields each chunk with its time and rolling variance columns filled in."""
+    tails = {pressure: np.empty(0) for pressure in PRESSURE_COLUMNS}
+    t_1 = None
+    for chunk in read_drifter_log(file_path, chunksize=chunk_size, **read_options):
+        if t_1 is None and len(chunk):
+            t_1 = chunk['time'].iloc[0]
+        add_time_columns(chunk, t_1)
+        for pressure in PRESSURE_COLUMNS:
+            chunk[rolling_variance_column(pressure)], tails[pressure] = _chunk_rolling_variance(
+                chunk[pressure].to_numpy(dtype='float64'), tails[pressure], window_size)
+        yield chunk
+
+
+def screen_log_streaming(file_path, output_directory, window_size=50, k=1, chunk_size=500_000, export_tsv=False,
+                         output_filenames=('filtered_pressure1.txt', 'filtered_pressure2.txt'),
+                         **read_options):
+    """
+    Screens a log chunk by chunk and writes its `roi.json` descriptor, with
+    `export_tsv=True` also the full filtered files.
+
+    Peak memory only depends on `chunk_size`, not on the length of the log.
+    Returns the ROI time range per pressure sensor, like `screen_log`.
+    """
+    # pass 1: mean and std of the rolling variance (chunk statistics combined
+    # with Chan's parallel formula, so long logs do not lose precision)
+    stats = {pressure: (0, 0.0, 0.0) for pressure in PRESSURE_COLUMNS}
+    for chunk in _iter_screened_chunks(file_path, window_size, chunk_size, read_options):
+        for pressure in PRESSURE_COLUMNS:
+            variance = chunk[rolling_variance_column(pressure)].dropna().to_numpy()
+            if len(variance) == 0:
+                continue
+            n_a, mean_a, m2_a = stats[pressure]
+            n_b, mean_b = len(variance), variance.mean()
+            m2_b = ((variance - mean_b) ** 2).sum()
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            stats[pressure] = (n, mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n)
+
+    thresholds = {}
+    for pressure, (n, mean, m2) in stats.items():
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        thresholds[pressure] = mean + k * std
+
+    # pass 2: first and last time above the threshold
+    bounds = {pressure: None for pressure in PRESSURE_COLUMNS}
+    for chunk in _iter_screened_chunks(file_path, window_size, chunk_size, read_options):
+        for pressure in PRESSURE_COLUMNS:
+            roi_times = chunk.loc[chunk[rolling_variance_column(pressure)] > thresholds[pressure], 'time']
+            if len(roi_times) == 0:
+                continue
+            start_time, end_time = roi_times.min(), roi_times.max()
+            if bounds[pressure] is not None:
+                start_time = min(start_time, bounds[pressure][0])
+                end_time = max(end_time, bounds[pressure][1])
+            bounds[pressure] = (start_time, end_time)
+
+    # pass 3: rows inside each ROI (positions in the parsed log), collected per
+    # chunk and joined across chunk boundaries; the TSV rows only on request
+    row_ranges = {pressure: [] for pressure in PRESSURE_COLUMNS}
+    output_files = {pressure: os.path.join(output_directory, filename)
+                    for pressure, filename in zip(PRESSURE_COLUMNS, output_filenames)}
+    written = {pressure: False for pressure in PRESSURE_COLUMNS}
+    offset = 0
+    for chunk in _iter_screened_chunks(file_path, window_size, chunk_size, read_options):
+        for pressure in PRESSURE_COLUMNS:
+            if bounds[pressure] is None:
+                continue
+            row_ranges[pressure].append(np.reshape(roi_rows(chunk, bounds[pressure]), (-1, 2)) + offset)
+            if export_tsv:
+                os.makedirs(output_directory, exist_ok=True)
+                rows = filter_roi(chunk, bounds[pressure])
+                rows.to_csv(output_files[pressure], index=False, sep='\t',
+                            mode='a' if written[pressure] else 'w', header=not written[pressure])
+                written[pressure] = True
+        offset += len(chunk)
+
+    rois = {pressure: None if bounds[pressure] is None
+            else roi_entry(union(*row_ranges[pressure]).tolist(), bounds[pressure])
+            for pressure in PRESSURE_COLUMNS}
+    descriptor_path = write_roi_descriptor(output_directory, file_path, rois, {'window_size': window_size, 'k': k})
+    print(f"ROI descriptor saved to {descriptor_path}")
+    for pressure in PRESSURE_COLUMNS:
+        if bounds[pressure] is None:
+            print(f"No region of interest found for {pressure}")
+        elif export_tsv:
+            print(f"Filtered data saved to {output_files[pressure]}")
+    return bounds
+
+
+def roi_minutes(time_range):
+    """Length of a ROI time range in minutes (0 when there is no ROI)."""
+    if time_range is None:
+        return 0.0
+    return float(time_range[1] - time_range[0]) * 0.001 / 60
+
+
+def roi_descriptors(data_file, bounds):
+    """Row and time range of every ROI, as stored in `roi.json`."""
+    rois = {}
+    for pressure in PRESSURE_COLUMNS:
+        if bounds[pressure] is None:
+            rois[pressure] = None
+            continue
+        rois[pressure] = roi_entry(roi_rows(data_file, bounds[pressure]), bounds[pressure])
+    return rois
+
+
+def export_roi_tsv(descriptor_path, sensor, output_file):
+    """
+    Materializes one ROI of a `roi.json` descriptor as the old full-width
+    `filtered_pressure*.txt` file, derived columns included.
+    """
+    descriptor = read_roi_descriptor(descriptor_path)
+    roi = descriptor['rois'][sensor]
+    data_file = load_channels(descriptor['source'])
+    add_time_columns(data_file)
+    variances = rolling_var(data_file[PRESSURE_COLUMNS].to_numpy(dtype='float64'),
+                            descriptor['parameters']['window_size'])
+    for i, pressure in enumerate(PRESSURE_COLUMNS):
+        data_file[rolling_variance_column(pressure)] = variances[:, i]
+    filtered_data = select_roi(data_file, roi)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    filtered_data.to_csv(output_file, index=False, sep='\t')
+    return filtered_data
+
+
+def screen_file(input_file_path, output_directory, window_size=50, k=2, min_minutes=5,
+                write_outputs=True, export_tsv=False, digest=None):
+    """
+    Reads, screens and saves one raw log, as `screening_plott.py` does.
+
+    Returns a summary with the ROI bounds per sensor and whether the
+    `pressure1` ROI passes the usefulness rule (at least `min_minutes` long).
+    The ROIs are saved as a `roi.json` descriptor; with `export_tsv=True` the
+    full `filtered_pressure*.txt` files are written as well (in the
+    background). `write_outputs=False` writes nothing.
+    """
+    data_file = read_drifter_log(input_file_path)
+    bounds = screen_log(data_file, window_size, k)
+    summary = {'rows': len(data_file)}
+    if write_outputs:
+        write_roi_descriptor(output_directory, input_file_path, roi_descriptors(data_file, bounds),
+                             {'window_size': window_size, 'k': k}, digest)
+    with BackgroundWriter() as writer:
+        for pressure, output_filename in zip(PRESSURE_COLUMNS, ['filtered_pressure1.txt', 'filtered_pressure2.txt']):
+            if write_outputs and export_tsv and bounds[pressure] is not None:
+                writer.save(filter_roi(data_file, bounds[pressure]), os.path.join(output_directory, output_filename))
+            summary[f'{pressure}_start'] = None if bounds[pressure] is None else float(bounds[pressure][0])
+            summary[f'{pressure}_end'] = None if bounds[pressure] is None else float(bounds[pressure][1])
+            summary[f'{pressure}_minutes'] = roi_minutes(bounds[pressure])
+        summary['useful'] = summary['pressure1_minutes'] >= min_minutes
+    return summary
+
+
+def threshold_bounds(variance, times, k_values):
+    """
+    ROI time range for every `k` in `k_values` from one rolling variance.
+
+    Returns a (len(k_values), 2) array of (start_time, end_time), NaN where
+    nothing exceeds `mean + k * std`. The rows above a threshold are a prefix
+    of the rows sorted by decreasing variance, so running min/max of their
+    times give all ranges after a single sort (same result as `screen_log`).
+    Rows without a time count for the thresholds but never bound a range.
+    """
+    variance = np.asarray(variance, dtype='float64')
+    times = np.asarray(times, dtype='float64')
+    k_values = np.atleast_1d(np.asarray(k_values, dtype='float64'))
+    valid = ~np.isnan(variance)
+    variance, times = variance[valid], times[valid]
+    bounds = np.full((len(k_values), 2), np.nan)
+    if len(variance) < 2:
+        return bounds
+
+    thresholds = variance.mean() + k_values * variance.std(ddof=1)
+    timed = ~np.isnan(times)
+    variance, times = variance[timed], times[timed]
+    order = np.argsort(-variance, kind='stable')
+    descending = variance[order]
+    first_times = np.minimum.accumulate(times[order])
+    last_times = np.maximum.accumulate(times[order])
+    # number of rows strictly above each threshold
+    n_above = np.searchsorted(-descending, -thresholds, side='left')
+    has_roi = n_above > 0
+    bounds[has_roi, 0] = first_times[n_above[has_roi] - 1]
+    bounds[has_roi, 1] = last_times[n_above[has_roi] - 1]
+    return bounds
+
+
+def sweep_file(input_file_path, k_values, window_size=50, min_minutes=5):
+    """
+    Screens one raw log for every `k` in `k_values`.
+
+    The log is read (through the channel cache) and its rolling variance
+    computed once. Returns one row per k and sensor with the ROI start/end,
+    the retained minutes and the usefulness verdict.
+    """
+    data_file = load_channels(input_file_path, ['time'] + PRESSURE_COLUMNS)
+    times = data_file['time'].to_numpy(dtype='float64')
+    variances = rolling_var(data_file[PRESSURE_COLUMNS].to_numpy(dtype='float64'), window_size)
+    rows = []
+    for i, pressure in enumerate(PRESSURE_COLUMNS):
+        bounds = threshold_bounds(variances[:, i], times, k_values)
+        for k, (start, end) in zip(np.atleast_1d(k_values), bounds):
+            minutes = 0.0 if np.isnan(start) else roi_minutes((start, end))
+            rows.append({'k': float(k), 'sensor': pressure,
+                         'start_s': float(start - times[0]) * 0.001, 'end_s': float(end - times[0]) * 0.001,
+                         'minutes': minutes, 'useful': minutes >= min_minutes})
+    return rows
@@ -0,0 +1,137 @@
+"""
+Sensor-stall detection of `Sensor_stall.py` for single files and whole campaigns.
+
+A stall is a stretch of at least `min_seconds` in which the rolling variance
+of the Kalman-filtered forward acceleration stays below a fraction of its
+maximum. The window is a number of samples or a time window such as `'1s'`;
+a time window covers the same time on every sensor, however many rows were
+dropped and whatever the sample rate. `detect_stalls_multiscale` evaluates a
+ladder of sample windows from one set of prefix sums (see `drifter.rolling`)
+and adds the consensus of the scales. `stall_summary` runs the detector on
+one screened deployment and `find_screened` lists the screened deployments
+below an output root (the `<date>/<sensor>/<file>` layout written by
+`cleaning/batch_screening.py`).
+"""
+
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from drifter.intervals import durations, intervals_to_mask, mask_to_intervals, min_duration
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
+from drifter.roi import ROI_FILE, load_screened
+from drifter.rolling import rolling_stats, rolling_var, rolling_var_time, window_length
+
+STALL_WINDOW = 100
+STALL_VARIANCE_FRACTION = 0.01
+STALL_MIN_SECONDS = 3
+STALL_WINDOWS = (50, 100, 200, 400)
+STALL_CHANNELS = ['time', 'pressure1', 'pressure2', 'accx', 'accy', 'accz']
+
+DATE_PATTERN = re.compile(r'^(\d{2})(\d{2})(\d{4})$')
+
+MultiScaleStalls = namedtuple('MultiScaleStalls', ['per_scale', 'consensus'])
+
+
+def _stall_intervals(rolling_variance, time_seconds, variance_fraction, min_seconds):
+    if not np.any(np.isfinite(rolling_variance)):
+        return mask_to_intervals(np.zeros(len(rolling_variance), dtype=bool))
+    flat = rolling_variance < variance_fraction * np.nanmax(rolling_variance)
+    return min_duration(mask_to_intervals(flat), time_seconds, min_seconds)
+
+
+def detect_stalls(filtered_accel, time_seconds, window_size=STALL_WINDOW, variance_fraction=STALL_VARIANCE_FRACTION,
+                  min_seconds=STALL_MIN_SECONDS):
+    """
+    Stall intervals (inclusive `[start, end]` positions, see `drifter.intervals`)
+    of a filtered acceleration signal sampled at `time_seconds`. `window_size`
+    is a number of samples or a time window (`'1s'`, `'500ms'`).
+    """
+    if isinstance(window_size, str):
+        # back to the millisecond `time` values, so the window edges are exact
+        times = np.round(np.asarray(time_seconds, dtype='float64') * 1000)
+        rolling_variance = rolling_var_time(filtered_accel, times, window_size)
+        # the windows before one full window length are incomplete
+        rolling_variance[times - times[:1] < window_length(window_size)] = np.nan
+    else:
+        rolling_variance = rolling_var(filtered_accel, window_size)
+    return _stall_intervals(rolling_variance, time_seconds, variance_fraction, min_seconds)
+
+
+def detect_stalls_multiscale(filtered_accel, time_seconds, windows=STALL_WINDOWS,
+                             variance_fraction=STALL_VARIANCE_FRACTION, min_seconds=STALL_MIN_SECONDS, min_votes=None):
+    """
+    `detect_stalls` for several sample windows at about the cost of one.
+
+    Returns a `MultiScaleStalls` with the stall intervals of every window
+    ({window: intervals}) and the consensus: the samples that are inside a
+    stall for at least `min_votes` windows (default: a majority), again
+    kept only when they last `min_seconds`.
+    """
+    windows = sorted(int(window) for window in windows)
+    min_votes = len(windows) // 2 + 1 if min_votes is None else min_votes
+    n_samples = len(filtered_accel)
+    stats = rolling_stats(filtered_accel, windows)
+    per_scale = {}
+    votes = np.zeros(n_samples, dtype='int64')
+    for window in windows:
+        per_scale[window] = _stall_intervals(stats[window].var, time_seconds, variance_fraction, min_seconds)
+        votes += intervals_to_mask(per_scale[window], n_samples)
+    consensus = min_duration(mask_to_intervals(votes >= min_votes), time_seconds, min_seconds)
+    return MultiScaleStalls(per_scale, consensus)
+
+
+def stall_summary(path, sensor='pressure1', window_size=STALL_WINDOW, variance_fraction=STALL_VARIANCE_FRACTION,
+                  min_seconds=STALL_MIN_SECONDS, windows=None):
+    """
+    Number and total duration of the stalls of one screened deployment
+    (`roi.json` or `filtered_pressure*.txt`), and the deployment duration.
+    With a list of `windows` the multi-scale consensus is counted instead of
+    `window_size`, and the stalls of every window are added as
+    `n_stalls_<window>`.
+    """
+    data_file = load_screened(path, STALL_CHANNELS, sensor)
+    add_time_columns(data_file)
+    prepare_acceleration(data_file, sensor=path)
+    time_seconds = data_file['time_seconds'].to_numpy()
+    if not len(time_seconds):
+        return {'n_stalls': 0, 'stall_seconds': 0.0, 'deployment_seconds': 0.0}
+    filtered_accel_x = smooth_acceleration(data_file, columns=['X_forward'])[:, 0]
+    summary = {}
+    if windows:
+        multiscale = detect_stalls_multiscale(filtered_accel_x, time_seconds, windows, variance_fraction, min_seconds)
+        stalls = multiscale.consensus
+        summary.update((f'n_stalls_{window}', len(intervals)) for window, intervals in multiscale.per_scale.items())
+    else:
+        stalls = detect_stalls(filtered_accel_x, time_seconds, window_size, variance_fraction, min_seconds)
+    return dict({
+        'n_stalls': len(stalls),
+        'stall_seconds': float(durations(stalls, time_seconds).sum()),
+        'deployment_seconds': float(time_seconds[-1] - time_seconds[0]),
+    }, **summary)
+
+
+def find_screened(root_directory, file_name='filtered_pressure1.txt'):
+    """
+    Screened deployments below `root_directory`, sorted by path: the
+    `roi.json` of every folder that has one, otherwise its exported `file_name`.
+    """
+    screened = []
+    for directory, _, file_names in os.walk(root_directory):
+        if ROI_FILE in file_names:
+            screened.append(os.path.join(directory, ROI_FILE))
+        elif file_name in file_names:
+            screened.append(os.path.join(directory, file_name))
+    return sorted(screened)
+
+
+def deployment_of(path, root_directory):
+    """`(date, sensor, file)` of a screened deployment in the `<date>/<sensor>/<file>/` layout."""
+    parts = os.path.relpath(os.path.dirname(path), root_directory).split(os.sep)
+    file_name = parts[-1]
+    date = next((part for part in parts[:-1] if DATE_PATTERN.match(part)), parts[0])
+    # 18072021 -> 18-07-2021, as on the heatmap
+    date = DATE_PATTERN.sub(r'\1-\2-\3', date)
+    return date, file_name[:3], file_name
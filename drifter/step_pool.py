@@ -0,0 +1,83 @@
+"""
+Parameter-grid evaluation of the step and pool detection of `Step_pool.py`
+and `Step_pool_Update.py`.
+
+Loading, rotation and Kalman filtering are done once per deployment
+(`load_step_pool_signals`); every grid point then only runs the vectorised
+detectors of `drifter.steps` and `drifter.pools` on the cached signals.
+Each detector depends on a part of the parameters only, so it is evaluated
+once per distinct combination of its own parameters and the counts are
+joined into the full grid.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from drifter.pools import detect_pools_dual, detect_pools_std
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
+from drifter.roi import load_screened
+from drifter.steps import detect_steps
+
+STEP_POOL_CHANNELS = ['time', 'pressure1', 'pressure2', 'accx', 'accy', 'accz']
+
+# the hand-tuned constants of Step_pool.py / Step_pool_Update.py and values around them
+DEFAULT_GRID = {
+    'z_threshold': [3, 4, 5, 6, 7],
+    'min_step_duration': [3, 5, 10],
+    'window_size': [2, 5, 10],
+    'pressure_threshold': [5, 10, 15, 20],
+    'std_multiplier': [3, 4, 5, 6],
+}
+
+STEP_PARAMETERS = ['z_threshold', 'min_step_duration']
+POOL_PARAMETERS = ['window_size', 'pressure_threshold']
+POOL_STD_PARAMETERS = ['window_size', 'std_multiplier']
+
+
+def parameter_grid(grid=None):
+    """All combinations of the parameter values, one row each."""
+    grid = dict(DEFAULT_GRID, **(grid or {}))
+    return pd.DataFrame(list(itertools.product(*grid.values())), columns=list(grid))
+
+
+def load_step_pool_signals(path, sensor='pressure1'):
+    """
+    Filtered vertical acceleration, time and both pressures of one screened
+    deployment (`roi.json` or `filtered_pressure*.txt`), prepared as in `Step_pool.py`.
+    """
+    data_file = load_screened(path, STEP_POOL_CHANNELS, sensor)
+    add_time_columns(data_file)
+    prepare_acceleration(data_file, sensor=path)
+    return {
+        'filtered_accel_z': smooth_acceleration(data_file, columns=['Z_upward'])[:, 0],
+        'time_seconds': data_file['time_seconds'].to_numpy(),
+        'pressure1': data_file['pressure1'].to_numpy(dtype='float64'),
+        'pressure2': data_file['pressure2'].to_numpy(dtype='float64'),
+    }
+
+
+def _counts(grid, parameters, count_column, detect):
+    combinations = grid[parameters].drop_duplicates()
+    counts = [len(detect(*combination)) for combination in combinations.itertuples(index=False)]
+    return combinations.assign(**{count_column: np.array(counts, dtype='int64')})
+
+
+def evaluate_grid(signals, grid):
+    """
+    Step and pool counts of one deployment for every row of `grid` (see
+    `parameter_grid`): `n_steps` (Step_pool.py steps), `n_pools` (Step_pool.py
+    dual-sensor pools) and `n_pools_std` (Step_pool_Update.py pools).
+    """
+    z, time_seconds = signals['filtered_accel_z'], signals['time_seconds']
+    pressure1, pressure2 = signals['pressure1'], signals['pressure2']
+    steps = _counts(grid, STEP_PARAMETERS, 'n_steps', lambda z_threshold, min_step_duration: detect_steps(
+        z, z_threshold, min_step_duration, time_seconds).intervals)
+    pools = _counts(grid, POOL_PARAMETERS, 'n_pools', lambda window_size, pressure_threshold: detect_pools_dual(
+        pressure1, pressure2, int(window_size), pressure_threshold))
+    pools_std = _counts(grid, POOL_STD_PARAMETERS, 'n_pools_std', lambda window_size, std_multiplier: detect_pools_std(
+        pressure1, pressure2, int(window_size), std_multiplier))
+    return (grid.merge(steps, on=STEP_PARAMETERS, how='left')
+                .merge(pools, on=POOL_PARAMETERS, how='left')
+                .merge(pools_std, on=POOL_STD_PARAMETERS, how='left'))
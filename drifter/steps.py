@@ -0,0 +1,49 @@
+"""
+Step detection of `Step_pool.py`: runs of the filtered vertical acceleration
+below a threshold that last at least a minimum number of samples.
+
+The runs come from the mask edges (`drifter.intervals`) and the per-step
+features from segment reductions and a cumulative trapezoid integral, so a
+long deployment takes milliseconds.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from drifter.intervals import mask_to_intervals, min_samples
+
+Steps = namedtuple('Steps', ['intervals', 'duration', 'min_z', 'integrated_z'])
+
+
+def step_features(intervals, accel_z, time_seconds=None):
+    """
+    Features of every step `[start, end]` (inclusive positions): duration,
+    minimum of `accel_z` and its trapezoid integral over the step. Without
+    `time_seconds` the sample index is the time axis.
+    """
+    intervals = np.asarray(intervals, dtype='int64').reshape(-1, 2)
+    z = np.asarray(accel_z, dtype='float64')
+    t = np.arange(len(z), dtype='float64') if time_seconds is None else np.asarray(time_seconds, dtype='float64')
+    starts, ends = intervals[:, 0], intervals[:, 1]
+    if not len(intervals):
+        return Steps(intervals, np.empty(0), np.empty(0), np.empty(0))
+
+    # minimum per step from one reduceat over [start, end + 1) boundaries; the
+    # appended sample only closes the last segment and its result is dropped
+    boundaries = np.column_stack([starts, ends + 1]).ravel()
+    min_z = np.minimum.reduceat(np.append(z, 0.0), boundaries)[::2]
+    integral = np.zeros(len(z))
+    np.cumsum((z[1:] + z[:-1]) / 2 * np.diff(t), out=integral[1:])
+    return Steps(intervals, t[ends] - t[starts], min_z, integral[ends] - integral[starts])
+
+
+def detect_steps(accel_z, threshold, min_step_samples, time_seconds=None):
+    """
+    Steps where `accel_z < threshold` for at least `min_step_samples`
+    consecutive samples, as a `Steps` of the intervals and their features
+    (see `step_features`).
+    """
+    z = np.asarray(accel_z, dtype='float64')
+    intervals = min_samples(mask_to_intervals(z < threshold), min_step_samples)
+    return step_features(intervals, z, time_seconds)
@@ -0,0 +1,90 @@
+"""
+Per-channel binary store for drifter deployments.
+
+A store is a directory with one contiguous `.npy` file per channel and a small
+`header.json` describing them:
+
+    <store>/header.json
+    <store>/time.npy
+    <store>/pressure1.npy
+    ...
+
+Channels are opened with `np.load(mmap_mode='r')`, so a script that only
+needs `pressure1`/`pressure2` or `accx..accz` never reads the other columns
+from disk and nothing is copied until the data is actually modified.
+"""
+
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from drifter.cache import CACHE_DIR, _touch, cache_key, evict
+from drifter.io import read_drifter_log
+
+STORE_VERSION = 1
+HEADER_FILE = 'header.json'
+
+
+def write_store(data_file, store_path):
+    """Writes every column of `data_file` to its own `.npy` file in `store_path`."""
+    tmp_path = f'{store_path}.{uuid.uuid4().hex}.tmp'
+    os.makedirs(tmp_path)
+    channels = {}
+    for col in data_file.columns:
+        values = np.ascontiguousarray(data_file[col].to_numpy())
+        np.save(os.path.join(tmp_path, f'{col}.npy'), values)
+        channels[col] = {'dtype': values.dtype.str, 'file': f'{col}.npy'}
+    header = {'version': STORE_VERSION, 'n_rows': len(data_file), 'channels': channels}
+    with open(os.path.join(tmp_path, HEADER_FILE), 'w') as f:
+        json.dump(header, f, indent=2)
+    # another process may have written the same store meanwhile, keep the first one
+    try:
+        os.rename(tmp_path, store_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def read_header(store_path):
+    with open(os.path.join(store_path, HEADER_FILE)) as f:
+        return json.load(f)
+
+
+def open_store(store_path, channels=None):
+    """
+    Memory-maps the requested channels (all of them by default) and returns
+    them as a dict of read-only arrays.
+    """
+    header = read_header(store_path)
+    if channels is None:
+        channels = list(header['channels'])
+    missing = [name for name in channels if name not in header['channels']]
+    if missing:
+        raise KeyError(f"Channels {missing} are not in store {store_path}")
+    return {name: np.load(os.path.join(store_path, header['channels'][name]['file']), mmap_mode='r')
+            for name in channels}
+
+
+def load_channels(file_path, channels=None, cache_dir=None, max_bytes=None, **read_options):
+    """
+    Returns a DataFrame with only the requested channels of a drifter log.
+
+    The log is parsed once with `read_drifter_log(file_path, **read_options)`
+    and written as a channel store in the cache directory; later calls
+    memory-map the stored channels without parsing or copying.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    store_path = os.path.join(cache_dir, f'{cache_key(file_path, cache_dir, **read_options)}.chan')
+    # the arrays are memory-mapped before any eviction, and a store evicted by
+    # another process between the check and the open is simply written again
+    try:
+        _touch(store_path)
+        arrays = open_store(store_path, channels)
+    except FileNotFoundError:
+        write_store(read_drifter_log(file_path, **read_options), store_path)
+        arrays = open_store(store_path, channels)
+        evict(cache_dir, max_bytes, keep=[store_path])
+    return pd.DataFrame(arrays, copy=False)
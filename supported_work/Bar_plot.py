@@ -1,52 +1,13 @@
+import os
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from matplotlib import cm
 import matplotlib.patches as mpatches
 
-# Data from your original request
-data = [
-    # 13.07.2021
-    ("13.07.2021", "M14", "M140713160508", 18),
-    ("13.07.2021", "M15", "M150713160801", 18),
-    ("13.07.2021", "M16", "M160713160519", 12),
-    ("13.07.2021", "M17", "M170713160406", 12),
-    ("13.07.2021", "M18", "M180713151102", 2),
-    ("13.07.2021", "M18", "M180713160427", 1),
-    ("13.07.2021", "M21", "M210713151106", 0),
-    ("13.07.2021", "M21", "M210713161036", 0),
-    # 15.07.2021
-    ("15.07.2021", "M15", "M150715104249", 12),
-    ("15.07.2021", "M15", "M150715144008", 4),
-    ("15.07.2021", "M15", "M150715161817", 16),
-    ("15.07.2021", "M16", "M160715153301", 7),
-    ("15.07.2021", "M16", "M160715161745", 17),
-    ("15.07.2021", "M17", "M170715104318", 18),
-    ("15.07.2021", "M17", "M170715161755", 17),
-    ("15.07.2021", "M18", "M180715104333", 2),
-    ("15.07.2021", "M18", "M180715161901", 4),
-    ("15.07.2021", "M19", "M190715141429", 0),
-    ("15.07.2021", "M21", "M210715104407", 1),
-    # 17.07.2021
-    ("17.07.2021", "M03", "M030717135325", 4),
-    ("17.07.2021", "M04", "M040717135101", 14),
-    ("17.07.2021", "M05", "M050717135331", 29),
-    ("17.07.2021", "M08", "M08-0717135422", 1),
-    # 18.07.2021
-    ("18.07.2021", "M04", "M040718173701", 20),
-    ("18.07.2021", "M04", "M040718144901", 17),
-    ("18.07.2021", "M08", "M08-0718173755", 23),
-    ("18.07.2021", "M10", "M100718144952", 2),
-    ("18.07.2021", "M10", "M100718173756", 2),
-    ("18.07.2021", "M23", "M23-0718144836", 2),
-    ("18.07.2021", "M24", "M24-0718144754", 2),
-    ("18.07.2021", "M24", "M24-0718173840", 2),
-    # 21.07.2021
-    ("21.07.2021", "M24", "M24-0721152536", 5),
-    ("21.07.2021", "M24", "M24-0721154941", 23),
-]
-
-df = pd.DataFrame(data, columns=["Date", "Sensor", "File", "Steps"])
+# Step-pool counts per deployment (also the reference of data_analysis/step_pool_sweep.py)
+counts_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'step_pool_counts.csv')
+df = pd.read_csv(counts_path, dtype={"Date": str, "Sensor": str, "File": str})
 
 plt.figure(figsize=(16, 8))
 
@@ -6,87 +6,31 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from hmmlearn import hmm
 from pykalman import KalmanFilter
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.intervals import durations, mask_to_intervals, min_duration
+from drifter.cache import cached_read
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
 
 # File path and initial setup
 sns.set(style="darkgrid")
 file_path = 'H:/Rida/Svalbard_data/outlier_removed/18.07.2021/M08/M08-0718173755/filtered_pressure_cleaned.txt'
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-R_body_to_global = np.array([
-    [0, 1, 0],
-    [-1, 0, 0],
-    [0, 0, -1]
-])
-
 # Load data
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    skiprows=1
-)
-data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+data_file = cached_read(file_path, skiprows=1)
 
 # Convert time to seconds and minutes
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
-
-# Drop rows with NaNs in critical columns
-data_file.dropna(subset=['accx', 'accy', 'accz'], inplace=True)
-# print([col.strip() for col in data_file.columns])
-
-# Function to rotate acceleration data into global frame
-def rotate_acceleration(accx, accy, accz, R_body_to_global):
-    acc_body = np.array([accx, accy, accz])  # original body-frame
-    acc_global = R_body_to_global @ acc_body
-    return acc_global
-
-# Applying the rotation to the acceleration data in the DataFrame
-data_file[['X_forward', 'Y_lateral', 'Z_upward']] = data_file.apply(
-    lambda row: rotate_acceleration(row['accx'], row['accy'], row['accz'], R_body_to_global), axis=1, result_type="expand"
-)
-
-# Kalman filter
-def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
-    x = initial_state
-    P = initial_covariance
-    filtered_data = []
-
-    for z in accel_data:
-        x_pred = x
-        P_pred = P + process_variance
-        K = P_pred / (P_pred + measurement_variance)
-        x = x_pred + K * (z - x_pred)
-        P = (1 - K) * P_pred
-        filtered_data.append(x)
-    
-    return np.array(filtered_data)
-
-# Example global acceleration data
-accel_data_x = data_file['X_forward'].values
-accel_data_y = data_file['Y_lateral'].values
-accel_data_z = data_file['Z_upward'].values
+add_time_columns(data_file)
+
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
 
 # Apply Kalman filter
 process_variance = 1e-4
 measurement_variance = 0.05
-filtered_accel_x = kalman_filter(accel_data_x, process_variance, measurement_variance)
-filtered_accel_y = kalman_filter(accel_data_y, process_variance, measurement_variance)
-filtered_accel_z = kalman_filter(accel_data_z, process_variance, measurement_variance)
+# the three axes are filtered together
+filtered_accel_x, filtered_accel_y, filtered_accel_z = smooth_acceleration(
+    data_file, process_variance, measurement_variance).T
 
 # Store filtered values in DataFrame
 data_file['filtered_X'] = filtered_accel_x
@@ -116,23 +60,12 @@ data_file['HMM_state'].ffill(inplace=True)
 stall_state = model.means_[:, 0].argmin()
 stall_mask = data_file['HMM_state'] == stall_state
 
-# Find stall regions longer than 3 seconds
-hatch_regions = []
-start_idx = None
-for i in range(len(data_file)):
-    if stall_mask.iloc[i]:
-        if start_idx is None:
-            start_idx = i
-    else:
-        if start_idx is not None:
-            end_idx = i - 1
-            duration = data_file['time_seconds'].iloc[end_idx] - data_file['time_seconds'].iloc[start_idx]
-            if duration >= 3:
-                hatch_regions.append((start_idx, end_idx))
-            start_idx = None
+# Find stall regions longer than 3 seconds (a stall still running at the end of the data counts too)
+time_seconds = data_file['time_seconds'].to_numpy()
+hatch_regions = min_duration(mask_to_intervals(stall_mask), time_seconds, 3)
 
 stall_count = len(hatch_regions)
-stall_duration = sum(data_file['time_seconds'].iloc[end] - data_file['time_seconds'].iloc[start] for start, end in hatch_regions)
+stall_duration = durations(hatch_regions, time_seconds).sum()
 deployment_duration = data_file['time_seconds'].iloc[-1] - data_file['time_seconds'].iloc[0]
 
 stall_count, stall_duration, deployment_duration
@@ -184,12 +117,7 @@ print(f"Total stall duration: {stall_duration:.2f} seconds")
 print(f"Total deployment duration: {deployment_duration:.2f} seconds")
 
 
-
 # print(data_file.columns)
 # print(data_file[['time', 'filtered_X', 'filtered_Y', 'filtered_Z', 'pressure1', 'pressure2']].head(10))
 
 
-
-
-
-
@@ -1,52 +1,28 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.signal import savgol_filter
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.roi import load_screened
+from drifter.preprocessing import add_time_columns, remove_outliers
 
 # Set Seaborn style for better plots
 sns.set(style="darkgrid")
 
 # File paths
+# either the roi.json written by the screening or an exported filtered_pressure1.txt
 input_file_path = 'H:/Rida/new/13072021/M18/M180713151102/filtered_pressure1.txt'
 output_directory = 'H:/Rida/new/outlier_removed/M18/M180713151102'
 os.makedirs(output_directory, exist_ok=True)
 
-# Column names
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz',
-    'time_seconds', 'time_minutes', 'rolling_variance1', 'rolling_variance2'
-]
-
 # Read file
-data_file = pd.read_csv(
-    input_file_path,
-    delimiter='\t',
-    names=column_names,
-    header=0,
-    usecols=range(17),  # Load only the first 17 columns
-    na_values=['', ' '],
-    engine='python'
-)
+data_file = load_screened(input_file_path)
 
 # Convert time
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
+add_time_columns(data_file)
 
 # --- Outlier Removal using IQR ---
-def remove_outliers(df, column):
-    Q1 = df[column].quantile(0.10)
-    Q3 = df[column].quantile(0.90)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-    return df[(df[column] >= lower_bound) & (df[column] <= upper_bound)]
-
 data_file_cleaned = remove_outliers(data_file, 'pressure1')
 data_file_cleaned = remove_outliers(data_file_cleaned, 'pressure2')
 
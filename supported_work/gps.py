@@ -1,7 +1,12 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.cache import cached_read
+from drifter.io import COLUMN_NAMES
+from drifter.preprocessing import add_time_columns
+from drifter.rolling import rolling_var
 
 # Configure Seaborn for better aesthetics
 sns.set(style="darkgrid")
@@ -11,42 +16,19 @@ file_path = 'H:/Rida/18072021/18072021/M08/raw/M08-0718144907.txt'
 output_directory = 'H:/Rida/'
 
 # Update column names to include GPS columns (assumed as latitude and longitude)
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz',
-    'latitude', 'longitude'  # New columns
-]
+column_names = COLUMN_NAMES + ['latitude', 'longitude']  # New columns
 
 # Read the data into a DataFrame (including GPS)
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(len(column_names)),  # Adjust for 19 columns now
-    on_bad_lines='skip'
-)
-
-# Replace invalid entries with NaN and convert columns to numeric
-data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+data_file = cached_read(file_path, column_names=column_names)
 
 # Convert 'time' to seconds and minutes
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
+add_time_columns(data_file)
 
 # Calculate rolling variance
 window_size = 50
-data_file['rolling_variance1'] = data_file['pressure1'].rolling(window=window_size).var()
-data_file['rolling_variance2'] = data_file['pressure2'].rolling(window=window_size).var()
+rolling_variance = rolling_var(data_file[['pressure1', 'pressure2']].to_numpy(), window_size)
+data_file['rolling_variance1'] = rolling_variance[:, 0]
+data_file['rolling_variance2'] = rolling_variance[:, 1]
 
 # Compute thresholds
 k = 1
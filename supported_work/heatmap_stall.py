@@ -1,46 +1,25 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.patches import Rectangle
 
-# Sample data
-data = [
-    ['13-07-2021', 'M14', 'M14-60508', 2],
-    ['13-07-2021', 'M15', 'M15-60801', 2],
-    ['13-07-2021', 'M16', 'M16-60519', 15],
-    ['13-07-2021', 'M17', 'M17-60406', 1],
-    ['13-07-2021', 'M18', 'M18-51102', 2],
-    ['13-07-2021','M18', 'M18-60427', 3],
-    ['13-07-2021','M21', 'M21-51106', 1],
-    ['13-07-2021','M21', 'M21-61036', 10],
-    ['15-07-2021','M15', 'M15-04249', 8],
-    ['15-07-2021','M15', 'M15-44008', 2],
-    ['15-07-2021','M15', 'M15-61817', 2],
-    ['15-07-2021','M16', 'M16-53301', 2],
-    ['15-07-2021','M16', 'M16-61745', 2],
-    ['15-07-2021','M17', 'M17-04318', 5],
-    ['15-07-2021','M17', 'M17-61755', 3],
-    ['15-07-2021','M18', 'M18-04333', 3],
-    ['15-07-2021','M18', 'M18-61901', 4],
-    ['15-07-2021','M19', 'M19-41429', 17],
-    ['15-07-2021','M21', 'M21-04407', 5],
-    ['17-07-2021','M03', 'M03-35325', 1],
-    ['17-07-2021','M04', 'M04-35101', 4],
-    ['17-07-2021','M05', 'M05-35331', 2],
-    ['17-07-2021','M08', 'M08-35422', 1],
-    ['18-07-2021','M04', 'M04-73701', 22],
-    ['18-07-2021','M04', 'M04-44901', 4],
-    ['18-07-2021','M08', 'M08-73755', 4],
-    ['18-07-2021','M10', 'M10-44952', 7],
-    ['18-07-2021','M10', 'M10-73756', 8],
-    ['18-07-2021','M23', 'M23-44836', 6],
-    ['18-07-2021','M24', 'M24-44754', 3],
-    ['18-07-2021','M24', 'M24-73840', 12],
-    ['21-07-2021','M24', 'M24-52536', 4],
-    ['21-07-2021','M24', 'M24-54941', 1],
-]
-
-df = pd.DataFrame(data, columns=['date', 'sensor', 'file_id', 'value'])
+# Stall counts per deployment: the checked-in counts of the thesis figure, or the
+# table written by data_analysis/batch_stall.py when its path is given
+# (python supported_work/heatmap_stall.py H:/Rida/new_data/stall_table.csv)
+stall_counts_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stall_counts.csv')
+stall_table_path = sys.argv[1] if len(sys.argv) > 1 else None
+
+if stall_table_path:
+    df = pd.read_csv(stall_table_path, dtype={'date': str, 'sensor': str, 'file': str})
+    if 'error' in df.columns:
+        df = df[df['error'].isna()]
+    # short file id shown in the cells, e.g. M24-0718173840.txt -> M24-73840
+    df['file_id'] = df['sensor'] + '-' + df['file'].str.replace(r'\.txt$', '', regex=True).str[-5:]
+    df['value'] = df['n_stalls']
+else:
+    df = pd.read_csv(stall_counts_path, dtype={'date': str, 'sensor': str, 'file_id': str})
 
 # Create numerical sorting key for sensors (M01 first)
 df['sensor_num'] = df['sensor'].str.extract('(\d+)').astype(int)
@@ -1,9 +1,12 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from scipy.spatial.transform import Rotation as R
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.orientation import integrate_gyro
+from drifter.cache import cached_read
+from drifter.preprocessing import add_time_columns
 
 # Configure Seaborn for better aesthetics
 sns.set(style="darkgrid")
@@ -12,37 +15,11 @@ sns.set(style="darkgrid")
 file_path = 'H:/Rida/outlier_removed/13.07.2021/M16/M160713160519/filtered_pressure_cleaned.txt'
 output_directory = 'H:/Rida/kalman/M16/'
 
-# Column names
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-
 # Read the data
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip'
-)
-
-# Clean invalid values
-data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+data_file = cached_read(file_path, skiprows=1)
 
 # Convert time to seconds and minutes
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
+add_time_columns(data_file)
 
 # Drop rows with NaNs in critical columns
 data_file.dropna(subset=['accx', 'accy', 'accz', 'gyx', 'gyy', 'gyz'], inplace=True)
@@ -59,45 +36,18 @@ dt = np.mean(np.diff(time))
 
 # Initialize orientation
 orientation_quat = np.array([1.0, 0.0, 0.0, 0.0])
-global_acc_list = []
-z_rotation_list = []
-z_acceleration_list = []
-
-# Orientation estimation
-for i in range(len(acc_world)):
-    acc_sample = acc_world[i]
-    gyro_sample = gyro_world[i]
-
-    omega = gyro_sample
-    theta = np.linalg.norm(omega * dt)
-    if theta != 0:
-        axis = omega / np.linalg.norm(omega)
-        delta_q = R.from_rotvec(axis * theta).as_quat()
-    else:
-        delta_q = np.array([0, 0, 0, 1])  # No rotation
-
-    # Update orientation
-    current_rot = R.from_quat(orientation_quat)
-    delta_rot = R.from_quat(delta_q)
-    updated_rot = current_rot * delta_rot
-    orientation_quat = updated_rot.as_quat()
-
-    # Extract Z-axis rotation (yaw)
-    euler_angles = updated_rot.as_euler('xyz', degrees=True)
-    yaw = euler_angles[2]  # Z-axis rotation
-    z_rotation_list.append(yaw)
-
-    # Convert to global acceleration
-    R_matrix = updated_rot.as_matrix()
-    acc_global = R_matrix @ acc_sample - np.array([0, 0, 9.81])  # gravity-compensated
-    global_acc_list.append(acc_global)
-
-    # Store Z-axis acceleration (vertical component)
-    z_acceleration_list.append(acc_global[0])  # Extracting the Z-axis (vertical) component of acceleration
-
-global_acc = np.array(global_acc_list)
-z_rotation = np.array(z_rotation_list)
-z_acceleration = np.array(z_acceleration_list)
+
+# Orientation estimation: all gyro increments are composed at once (orientation after every sample)
+orientation = integrate_gyro(gyro_world, dt, orientation_quat)
+
+# Extract Z-axis rotation (yaw)
+z_rotation = orientation.as_euler('xyz', degrees=True)[:, 2]
+
+# Convert to global acceleration
+global_acc = orientation.apply(acc_world) - np.array([0, 0, 9.81])  # gravity-compensated
+
+# Store Z-axis acceleration (vertical component)
+z_acceleration = global_acc[:, 0]  # Extracting the Z-axis (vertical) component of acceleration
 time_minutes = data_file['time_minutes'].to_numpy()
 
 # Plot Z-axis rotation (Yaw)
@@ -1,84 +1,22 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import numpy as np
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.cache import cached_read
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
 
 sns.set(style="darkgrid")
 file_path = 'H:/Rida/outlier_removed/18.07.2021/M04/M040718173701/filtered_pressure_cleaned.txt'
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-
-# rotation matrix
-# (90-degree rotation around Z-axis with flip on Z)
-R_body_to_global = np.array([
-    [0, 1, 0],
-    [-1, 0, 0],
-    [0, 0, -1]
-])
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    skiprows=1  # This will skip the first row
-)
-
-data_file.replace('�', pd.NA, inplace=True) # clean invalid values
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+data_file = cached_read(file_path, skiprows=1)
 
 # here this convert time to seconds and minutes
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
-
-# this drop rows with NaNs in critical columns
-data_file.dropna(subset=['accx', 'accy', 'accz'], inplace=True)
-
-# function to rotate acceleration data into global frame
-def rotate_acceleration(accx, accy, accz, R_body_to_global):
-    acc_body = np.array([accx, accy, accz])  # original body-frame
-    acc_global = R_body_to_global @ acc_body
-    return acc_global
-
-# applying the rotation to the acceleration data in the DataFrame
-data_file[['X_forward', 'Y_lateral', 'Z_upward']] = data_file.apply(
-    lambda row: rotate_acceleration(row['accx'], row['accy'], row['accz'], R_body_to_global), axis=1, result_type="expand"
-)
-
-
-def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
-    # initialize state and covariance
-    x = initial_state
-    P = initial_covariance
-    filtered_data = []
-
-    # Kalman filter loop
-    for z in accel_data:
-        # prediction step (no change in state model here, assume constant acceleration)
-        x_pred = x
-        P_pred = P + process_variance
+add_time_columns(data_file)
 
-        # update step
-        K = P_pred / (P_pred + measurement_variance)  # Kalman gain
-        x = x_pred + K * (z - x_pred)  # update the state estimate
-        P = (1 - K) * P_pred  # update the covariance
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
 
-        # storing filtered result
-        filtered_data.append(x)
-    
-    return np.array(filtered_data)
 
 # example global acceleration data (X_forward, Y_lateral, Z_upward)
 accel_data_x = data_file['X_forward'].values
@@ -89,10 +27,9 @@ accel_data_z = data_file['Z_upward'].values
 process_variance = 1e-4  # assumed process variance (system noise)
 measurement_variance = 0.05  # assumed measurement variance (sensor noise)
 
-# apply Kalman filter to the X_forward, Y_lateral, Z_upward data
-filtered_accel_x = kalman_filter(accel_data_x, process_variance, measurement_variance)
-filtered_accel_y = kalman_filter(accel_data_y, process_variance, measurement_variance)
-filtered_accel_z = kalman_filter(accel_data_z, process_variance, measurement_variance)
+# apply Kalman filter to the X_forward, Y_lateral, Z_upward data (in one pass)
+filtered_accel_x, filtered_accel_y, filtered_accel_z = smooth_acceleration(
+    data_file, process_variance, measurement_variance).T
 
 fig, axes = plt.subplots(3, 1, figsize=(12, 8), sharex=True, sharey=False)
 
@@ -4,86 +4,34 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from scipy.signal import correlate
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.rolling import rolling_var
+from drifter.cache import cached_read
+from drifter.preprocessing import add_time_columns, prepare_acceleration, smooth_acceleration
 
 sns.set(style="darkgrid")
 
 file_path = 'H:/Rida/outlier_removed/15.07.2021/M16/M160715161745/filtered_pressure_cleaned.txt'
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-
-# Rotation matrix
-R_body_to_global = np.array([
-    [0, 1, 0],
-    [-1, 0, 0],
-    [0, 0, -1]
-])
-
-data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    skiprows=1
-)
-
-data_file.replace('�', pd.NA, inplace=True)  # clean invalid values
-for col in column_names:
-    if col != 'time':
-        data_file[col] = pd.to_numeric(data_file[col], errors='coerce')
+data_file = cached_read(file_path, skiprows=1)
 
 # Convert time to seconds and minutes
-t_1 = data_file['time'].iloc[0]
-data_file['time_seconds'] = (data_file['time'] - t_1) * 0.001
-data_file['time_minutes'] = data_file['time_seconds'] / 60
+add_time_columns(data_file)
 
-# Drop rows with NaNs in critical columns
-data_file.dropna(subset=['accx', 'accy', 'accz'], inplace=True)
-
-# Rotate acceleration data into global frame
-def rotate_acceleration(accx, accy, accz, R_body_to_global):
-    acc_body = np.array([accx, accy, accz])
-    acc_global = R_body_to_global @ acc_body
-    return acc_global
-
-data_file[['X_forward', 'Y_lateral', 'Z_upward']] = data_file.apply(
-    lambda row: rotate_acceleration(row['accx'], row['accy'], row['accz'], R_body_to_global), axis=1, result_type="expand"
-)
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
 
 # Kalman filter
-def kalman_filter(accel_data, process_variance, measurement_variance, initial_state=0, initial_covariance=1):
-    x = initial_state
-    P = initial_covariance
-    filtered_data = []
-
-    for z in accel_data:
-        x_pred = x
-        P_pred = P + process_variance
-        K = P_pred / (P_pred + measurement_variance)
-        x = x_pred + K * (z - x_pred)
-        P = (1 - K) * P_pred
-        filtered_data.append(x)
-    
-    return np.array(filtered_data)
-
 # Apply Kalman filter to acceleration data
 process_variance = 1e-4
 measurement_variance = 0.05
-filtered_accel_x = kalman_filter(data_file['X_forward'].values, process_variance, measurement_variance)
-filtered_accel_y = kalman_filter(data_file['Y_lateral'].values, process_variance, measurement_variance)
-filtered_accel_z = kalman_filter(data_file['Z_upward'].values, process_variance, measurement_variance)
+filtered_accel_x, filtered_accel_y, filtered_accel_z = smooth_acceleration(
+    data_file, process_variance, measurement_variance).T
 
 # Compute rolling variance for filtered_accel_x
 window_size = 100
-rolling_variance = pd.Series(filtered_accel_x).rolling(window=window_size).var()
+rolling_variance = pd.Series(rolling_var(filtered_accel_x, window_size))
 
 # Identify flat regions (low variance and at least 1 sec duration)
 variance_threshold = 0.01 * rolling_variance.max()
@@ -0,0 +1,58 @@
+import os
+import matplotlib.pyplot as plt
+import seaborn as sns
+import numpy as np
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.roi import load_screened
+from drifter.frames import GLOBAL_COLUMNS
+from drifter.kalman import kalman_filter
+from drifter.preprocessing import add_time_columns, prepare_acceleration
+from drifter.motion import motion_smoother
+
+# Smoothed motion (acceleration, velocity, displacement) per global axis with the
+# constant-acceleration Kalman filter + RTS smoother, compared with the causal
+# random-walk filter used in the stall and step-pool scripts.
+
+sns.set(style="darkgrid")
+# either an exported filtered_pressure1.txt or the roi.json written by the screening
+file_path = 'H:/Rida/Kongsvegen_data/Screened_data/18072021/M04/M040718173701.txt/filtered_pressure1.txt'
+
+data_file = load_screened(file_path, ['time', 'accx', 'accy', 'accz'])
+
+# time convertion to secs and minutes
+add_time_columns(data_file)
+
+# drop rows without accelerations and rotate the rest into the global frame
+# (rotation of this sensor from drifter/rotations.json)
+prepare_acceleration(data_file, sensor=file_path)
+accel_data = data_file[GLOBAL_COLUMNS].to_numpy()
+dt = np.median(np.diff(data_file['time_seconds'].to_numpy()))
+
+# tuning parameters: jerk noise density (m^2/s^5) and sensor noise (m^2/s^4), per axis
+jerk_variance = 1e-2
+measurement_variance = 0.05
+
+# offline smoother over the whole deployment (no lag), causal filter for comparison
+smoothed = motion_smoother(accel_data, dt, jerk_variance, measurement_variance)
+causal_accel = kalman_filter(accel_data, 1e-4, measurement_variance)
+
+fig, axes = plt.subplots(3, 3, figsize=(16, 10), sharex=True)
+for i, axis_name in enumerate(GLOBAL_COLUMNS):
+    axes[0, i].plot(data_file['time_minutes'], accel_data[:, i], label='Measured', color='gray', alpha=0.4)
+    axes[0, i].plot(data_file['time_minutes'], causal_accel[:, i], label='Causal Kalman filter', color='tab:orange')
+    axes[0, i].plot(data_file['time_minutes'], smoothed.acceleration[:, i], label='RTS smoothed', color='tab:blue')
+    axes[0, i].set_title(axis_name)
+    axes[0, i].set_ylabel('Acceleration (m/s²)')
+    axes[0, i].legend()
+
+    axes[1, i].plot(data_file['time_minutes'], smoothed.velocity[:, i], color='tab:green')
+    axes[1, i].set_ylabel('Velocity (m/s)')
+
+    axes[2, i].plot(data_file['time_minutes'], smoothed.position[:, i], color='tab:purple')
+    axes[2, i].set_ylabel('Displacement (m)')
+    axes[2, i].set_xlabel('Time (minutes)')
+
+plt.suptitle('Constant-acceleration RTS smoother (velocity and displacement drift with any acceleration bias)')
+plt.tight_layout()
+plt.show()
@@ -1,7 +1,10 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drifter.cache import cached_read
+from drifter.preprocessing import add_time_columns
 
 # Configure Seaborn for better aesthetics
 sns.set(style="darkgrid")
@@ -9,38 +12,11 @@ sns.set(style="darkgrid")
 # Define the path to the data file
 file_path = 'H:/Rida/Dataset/13072021/M18/M180713151102.txt'
 
-# Define column names for the dataset (first 17 columns)
-column_names = [
-    'time', 'pressure1', 'temp1', 'pressure2', 'temp2',
-    'accx', 'accy', 'accz',
-    'gyx', 'gyy', 'gyz',
-    'magx', 'magy', 'magz',
-    'hgax', 'hgay', 'hgaz'
-]
-
 # Read the data into a DataFrame (only the first 17 columns)
-sensor_data_file = pd.read_csv(
-    file_path,
-    names=column_names,
-    delimiter=',',
-    header=None,
-    na_values=['', ' '],
-    engine='python',
-    usecols=range(17),
-    on_bad_lines='skip',
-    encoding='ISO-8859-1'
-)
-
-# Replace invalid entries with NaN and convert columns to numeric
-sensor_data_file.replace('�', pd.NA, inplace=True)
-for col in column_names:
-    if col != 'time':
-        sensor_data_file[col] = pd.to_numeric(sensor_data_file[col], errors='coerce')
+sensor_data_file = cached_read(file_path)
 
 # Convert 'time' to seconds and minutes
-t_1 = sensor_data_file['time'].iloc[0]
-sensor_data_file['time_seconds'] = (sensor_data_file['time'] - t_1) * 0.001
-sensor_data_file['time_minutes'] = sensor_data_file['time_seconds'] / 60
+add_time_columns(sensor_data_file)
 
 # Compute rolling standard deviation for pressure1
 window_size = 100